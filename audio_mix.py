@@ -0,0 +1,194 @@
+"""
+🎚️ Vectorized Audio Mixer
+==========================
+Builds the reel's soundtrack in a few numpy passes:
+- Voice and music are decoded once to float32 PCM by ffmpeg
+- Music tracks are decoded once into a PCM cache (.cache/music/) and
+  memory-mapped at render time
+- Music is looped/trimmed to the video length with index arithmetic
+- Sidechain ducking: an envelope computed from the voice lowers the
+  music under speech and lets it back up in the pauses
+- The result is an in-memory AudioArrayClip, so export needs no
+  per-chunk Python callbacks
+"""
+
+import os
+import subprocess
+
+import numpy as np
+from moviepy.audio.AudioClip import AudioArrayClip
+
+from disk_cache import DiskCache, file_digest, make_key
+
+# --- Configuration ---
+AUDIO_FPS = 44100
+CHANNELS = 2
+MUSIC_GAIN = 0.45      # Music level in pauses
+DUCK_GAIN = 0.2        # Music level under speech
+DUCK_WINDOW = 0.02     # Seconds per envelope block
+DUCK_THRESHOLD_DB = -30.0  # Blocks quieter than this (relative to the loudest) count as silence
+DUCK_HOLD = 0.15       # Seconds the duck stays down around speech
+DUCK_SMOOTH = 0.12     # Seconds of fade in/out of the duck
+MUSIC_CACHE_MAX_MB = int(os.getenv("MUSIC_CACHE_MAX_MB", "1024"))
+
+music_cache = DiskCache("music", MUSIC_CACHE_MAX_MB)
+
+
+def _ffmpeg_exe():
+    from imageio_ffmpeg import get_ffmpeg_exe
+    return get_ffmpeg_exe()
+
+
+def decode_audio(path, fps=AUDIO_FPS, channels=CHANNELS):
+    """
+    Decode any audio file to PCM.
+
+    Args:
+        path: Audio file path
+        fps: Sample rate to resample to
+        channels: Number of output channels
+
+    Returns:
+        float32 array of shape (samples, channels) in [-1, 1]
+    """
+    cmd = [_ffmpeg_exe(), "-v", "error", "-i", path, "-vn",
+           "-f", "f32le", "-acodec", "pcm_f32le", "-ar", str(fps), "-ac", str(channels), "-"]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors="replace").strip() or f"ffmpeg could not decode {path}")
+    pcm = np.frombuffer(result.stdout, dtype=np.float32)
+    return pcm[:len(pcm) // channels * channels].reshape(-1, channels)
+
+
+def load_music(path, fps=AUDIO_FPS, channels=CHANNELS):
+    """
+    Memory-map the decoded PCM of a music track, decoding it on first use.
+
+    Args:
+        path: Music file path
+        fps: Sample rate
+        channels: Number of channels
+
+    Returns:
+        Read-only float32 array of shape (samples, channels)
+    """
+    key = make_key(file_digest(path), fps, channels, "f32le")
+    pcm = music_cache.load_array(key, mmap=True)
+    if pcm is None:
+        music_cache.save_array(key, decode_audio(path, fps, channels))
+        pcm = music_cache.load_array(key, mmap=True)
+    return pcm
+
+
+def _add_looped(out, pcm, gain=1.0):
+    """
+    out += pcm * gain, repeating pcm until out is full.
+
+    Works on slices of the (possibly memory-mapped) source, so looping
+    never materializes a repeated copy of the track.
+    """
+    n = len(out)
+    if not len(pcm):
+        return out
+    for start in range(0, n, len(pcm)):
+        end = min(n, start + len(pcm))
+        g = gain[start:end, None] if np.ndim(gain) else gain
+        out[start:end] += pcm[:end - start] * g
+    return out
+
+
+def fit_length(pcm, n_samples):
+    """Trim PCM to n_samples, or pad it with silence"""
+    if len(pcm) >= n_samples:
+        return pcm[:n_samples]
+    out = np.zeros((n_samples,) + pcm.shape[1:], dtype=pcm.dtype)
+    out[:len(pcm)] = pcm
+    return out
+
+
+def _moving_average(values, width):
+    if width <= 1:
+        return values
+    # Edge padding so the envelope doesn't sag towards 0 at the ends
+    padded = np.pad(values, (width // 2, width - 1 - width // 2), mode="edge")
+    return np.convolve(padded, np.ones(width) / width, mode="valid")
+
+
+def voice_envelope(voice, fps=AUDIO_FPS, window=DUCK_WINDOW, threshold_db=DUCK_THRESHOLD_DB,
+                   hold=DUCK_HOLD, smooth=DUCK_SMOOTH):
+    """
+    Per-sample speech envelope (0 = silence, 1 = speech).
+
+    Block RMS is gated against the loudest block, held open briefly around
+    speech so the music doesn't pump between words, then smoothed.
+
+    Args:
+        voice: PCM array (samples,) or (samples, channels)
+        fps: Sample rate
+        window: Seconds per analysis block
+        threshold_db: Gate level relative to the loudest block
+        hold: Seconds to keep the gate open before/after speech
+        smooth: Seconds of fade at the gate edges
+
+    Returns:
+        float32 array of shape (samples,)
+    """
+    mono = voice.mean(axis=1) if voice.ndim > 1 else voice
+    n = len(mono)
+    block = max(1, int(fps * window))
+    n_blocks = -(-n // block)
+    if n_blocks == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    padded = np.zeros(n_blocks * block, dtype=np.float32)
+    padded[:n] = mono
+    rms = np.sqrt(np.mean(padded.reshape(n_blocks, block) ** 2, axis=1))
+    if rms.max() <= 0:
+        return np.zeros(n, dtype=np.float32)
+
+    gate = (rms > rms.max() * 10 ** (threshold_db / 20)).astype(np.float64)
+    hold_blocks = int(round(hold / window))
+    if hold_blocks:
+        gate = (np.convolve(gate, np.ones(2 * hold_blocks + 1), mode="same") > 0).astype(np.float64)
+    gate = _moving_average(gate, int(round(smooth / window)))
+
+    # Block centres -> samples
+    centres = (np.arange(n_blocks) + 0.5) * block
+    return np.interp(np.arange(n), centres, gate).astype(np.float32)
+
+
+def mix_audio(duration, voice=None, music=None, fps=AUDIO_FPS,
+              music_gain=MUSIC_GAIN, duck_gain=DUCK_GAIN):
+    """
+    Mix voice and background music into the final soundtrack.
+
+    Args:
+        duration: Video duration in seconds
+        voice: Voice PCM (or None)
+        music: Music PCM, looped to the video length (or None)
+        fps: Sample rate of the PCM arrays
+        music_gain: Music level when nobody is speaking (music-only reels use 1.0)
+        duck_gain: Music level under speech
+
+    Returns:
+        AudioArrayClip of exactly `duration`, or None if there is no audio
+    """
+    if voice is None and music is None:
+        return None
+
+    n_samples = int(round(duration * fps))
+    mix = np.zeros((n_samples, CHANNELS), dtype=np.float32)
+
+    if voice is not None:
+        voice = fit_length(voice, n_samples)
+        mix += voice
+
+    if music is not None:
+        if voice is not None:
+            gain = music_gain - (music_gain - duck_gain) * voice_envelope(voice, fps)
+            _add_looped(mix, music, gain)
+        else:
+            _add_looped(mix, music)  # Music-only reels keep the track at full level
+
+    np.clip(mix, -1.0, 1.0, out=mix)
+    return AudioArrayClip(mix, fps=fps)
@@ -0,0 +1,200 @@
+"""
+📦 Batch Reel Renderer
+=======================
+Renders many reels from a JSONL job file in one long-lived process:
+- Imports, asset discovery and cache warmup are paid once per batch
+- The image library is synced, transitions are normalized, music decoded
+  and voices fetched up front, then shared by every job (graded images
+  through the frame cache)
+- All jobs use the same render profile (encoder settings)
+- Configurable number of jobs rendering at the same time, sharing one
+  process pool (RENDER_WORKERS processes for the whole batch)
+
+Job file: one JSON object per line, e.g.
+    {"text": "जीत हमारी होगी", "filter": "warm", "num_images": 6,
+     "music": "track.mp3", "output": "monday.mp4"}
+Only "text" is required.
+
+Usage: python batch_render.py jobs.jsonl [--concurrency 2] [--profile final]
+"""
+
+# --- 🛠️ FIX FOR PILLOW 10+ CRASH (MUST BE AT TOP) ---
+import PIL.Image
+if not hasattr(PIL.Image, 'ANTIALIAS'):
+    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+# ----------------------------------------------------
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_mix import load_music
+from render_profiles import get_profile, available_profiles, DEFAULT_PROFILE
+from transition_cache import prepare_transitions, list_transitions, TRANSITION_DURATION
+from voice_fx import get_voice_async
+from image_library import ImageLibrary
+from stage_scheduler import process_pool
+from video_editor import (create_viral_reel_advanced, cleanup_temp_files, IMAGES_DIR, MUSIC_DIR,
+                          EXPORT_BACKENDS, RENDER_WORKERS)
+
+# --- Configuration ---
+JOB_FIELDS = {"text": str, "filter": str, "num_images": int, "music": str, "output": str}
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "1"))
+VOICE_PREFETCH = 4  # Voices fetched from edge-tts at the same time
+
+
+def load_jobs(path):
+    """
+    Read and validate a JSONL job file.
+
+    Returns:
+        List of job dicts (with "output" filled in)
+    """
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"❌ {path}:{line_no}: invalid JSON ({e})")
+            if not isinstance(job, dict) or not str(job.get("text", "")).strip():
+                raise ValueError(f"❌ {path}:{line_no}: every job needs a non-empty \"text\"")
+            unknown = set(job) - set(JOB_FIELDS)
+            if unknown:
+                raise ValueError(f"❌ {path}:{line_no}: unknown field(s): {', '.join(sorted(unknown))}")
+            for field, kind in JOB_FIELDS.items():
+                if field in job and not isinstance(job[field], kind):
+                    raise ValueError(f"❌ {path}:{line_no}: \"{field}\" must be {kind.__name__}")
+            job.setdefault("output", f"reel_{len(jobs) + 1:03d}.mp4")
+            jobs.append(job)
+
+    outputs = [job["output"] for job in jobs]
+    if len(set(outputs)) != len(outputs):
+        raise ValueError(f"❌ {path}: output names must be unique")
+    return jobs
+
+
+async def _prefetch_voices(texts):
+    limit = asyncio.Semaphore(VOICE_PREFETCH)
+
+    async def fetch(text):
+        async with limit:
+            try:
+                await get_voice_async(text)
+                return True
+            except Exception as e:
+                print(f"   ⚠️ Voice prefetch failed ({text[:20]}...): {e}")
+                return False
+
+    return await asyncio.gather(*(fetch(text) for text in texts))
+
+
+def warm_up(jobs, profile=None, library=None):
+    """Prepare every asset the jobs share before rendering starts"""
+    settings = get_profile(profile)
+    print("🔥 Warming up shared assets...")
+
+    # Once, so concurrent jobs don't all analyze new images at the same time
+    added, removed = (library or ImageLibrary(IMAGES_DIR)).sync()
+    print(f"   🗂️ Image library synced ({added} analyzed, {removed} removed)")
+
+    built = prepare_transitions(list_transitions(), settings["size"], settings["fps"], TRANSITION_DURATION)
+    print(f"   ⚡ Transitions ready ({built} normalized)")
+
+    tracks = {job["music"] for job in jobs if job.get("music")}
+    if not tracks and os.path.isdir(MUSIC_DIR):
+        tracks = {f for f in os.listdir(MUSIC_DIR) if f.lower().endswith('.mp3')}
+    for track in sorted(tracks):
+        path = track if os.path.exists(track) else os.path.join(MUSIC_DIR, track)
+        if os.path.exists(path):
+            load_music(path)
+    print(f"   🎵 {len(tracks)} music track(s) decoded")
+
+    texts = sorted({job["text"] for job in jobs})
+    fetched = asyncio.run(_prefetch_voices(texts))
+    print(f"   🎙️ {sum(fetched)}/{len(texts)} voice-over(s) ready")
+
+
+def render_job(job, profile=None, export_backend=None, library=None, processes=None):
+    """Render one job, returning (output_name, error or None, seconds)"""
+    start = time.time()
+    try:
+        create_viral_reel_advanced(
+            job["text"],
+            output_name=job["output"],
+            num_images=job.get("num_images"),
+            filter_type=job.get("filter"),
+            music=job.get("music"),
+            profile=profile,
+            export_backend=export_backend,
+            cleanup=False,
+            library=library,
+            processes=processes
+        )
+        return job["output"], None, time.time() - start
+    except Exception as e:
+        return job["output"], e, time.time() - start
+
+
+def render_batch(jobs, concurrency=None, profile=None, export_backend=None):
+    """
+    Render all jobs in this process.
+
+    Args:
+        jobs: Job dicts from load_jobs()
+        concurrency: Jobs rendering at the same time (default: BATCH_CONCURRENCY)
+        profile: Render profile shared by every job
+        export_backend: Export backend shared by every job
+
+    Returns:
+        List of (output_name, error or None, seconds) in job order
+    """
+    concurrency = max(1, concurrency or BATCH_CONCURRENCY)
+    started = time.time()
+    # One library for every job, so each one is handed different images
+    library = ImageLibrary(IMAGES_DIR)
+    warm_up(jobs, profile, library)
+
+    print(f"\n📦 Rendering {len(jobs)} reel(s), {concurrency} at a time...")
+    # One process pool for the whole batch (RENDER_WORKERS processes, not
+    # that many per concurrent job), started before the job threads
+    processes = process_pool(RENDER_WORKERS)
+    processes.submit(os.getpid).result()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(
+                lambda job: render_job(job, profile, export_backend, library, processes), jobs))
+    finally:
+        processes.shutdown(wait=True)
+        cleanup_temp_files()
+
+    failed = [r for r in results if r[1] is not None]
+    print("\n" + "="*60)
+    print(f"📦 BATCH DONE: {len(results) - len(failed)}/{len(results)} reels in {time.time() - started:.1f}s")
+    print("="*60)
+    for name, error, seconds in results:
+        status = "✅" if error is None else f"❌ {error}"
+        print(f"   {name:<30} {seconds:6.1f}s  {status}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a batch of reels from a JSONL job file")
+    parser.add_argument("jobs", help="JSONL file with one job per line")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY,
+                        help="Jobs rendering at the same time")
+    parser.add_argument("--profile", choices=available_profiles(), default=DEFAULT_PROFILE,
+                        help="Render profile shared by every job")
+    parser.add_argument("--export-backend", choices=EXPORT_BACKENDS, default=None,
+                        help="Export backend (default: EXPORT_BACKEND or moviepy)")
+    args = parser.parse_args()
+
+    results = render_batch(load_jobs(args.jobs), args.concurrency, args.profile, args.export_backend)
+    if any(error is not None for _, error, _ in results):
+        raise SystemExit(1)
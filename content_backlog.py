@@ -0,0 +1,292 @@
+"""
+📚 Content Backlog
+===================
+Keeps a local queue of ready-to-post scripts so posting never waits on Gemini:
+- One Gemini request generates a whole batch of scripts (one per theme)
+- Every script is validated before it is queued
+- Each run reads the oldest script from the queue; scripts too similar to
+  one already posted (script_index.py) are skipped before any TTS starts
+- A new batch is also checked against itself, so two near-identical
+  scripts from one Gemini response are never both queued
+- A script is only removed from the queue and indexed once it has been
+  posted (mark_posted), so drafts and failed renders or uploads use it again
+- When the queue drops below a threshold it is refilled in a background
+  thread while the reel renders
+- Responses come from a content provider (content_provider.py): live
+  Gemini, or a recorded cassette for offline runs
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from content_provider import GeminiProvider
+from disk_cache import CACHE_DIR
+from script_index import ScriptIndex
+
+# --- Configuration ---
+BACKLOG_FILE = os.path.join(CACHE_DIR, "content_backlog.json")
+BACKLOG_BATCH_SIZE = int(os.getenv("BACKLOG_BATCH_SIZE", "7"))   # Scripts per Gemini request
+BACKLOG_MIN_SIZE = int(os.getenv("BACKLOG_MIN_SIZE", "3"))       # Refill below this many
+MAX_SYNC_REFILLS = 2  # Gemini requests one run may wait on when every script is a repeat
+REQUIRED_FIELDS = ['hindi_quote', 'english_translation', 'caption', 'hashtags']
+
+THEMES = [
+    "discipline over emotion",
+    "faith as structure, not comfort",
+    "masculinity without arrogance",
+    "silence, patience, restraint",
+    "obedience before results",
+    "losing ego to gain direction",
+    "becoming dangerous to laziness, not people"
+]
+
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]")
+_live_provider = GeminiProvider()  # One Gemini client per process
+
+
+def build_prompt(themes):
+    """Prompt asking for one script per theme, returned as a JSON array"""
+    theme_list = " ".join(f"{i + 1}. {theme}." for i, theme in enumerate(themes))
+    return (
+        f"Role: You are an anonymous disciplined spiritual guide for men who feel lost. "
+        f"Your voice is calm, grounded, and authoritative — never loud, never motivational. "
+        f"You speak like someone who has suffered, learned, and simplified life. "
+        f"Themes (one video each, in this order): {theme_list} "
+        f"Session ID: {int(time.time())}. "
+
+        f"Task: For EACH theme, generate a UNIQUE Hindi (Devanagari) script for a 15-second video. "
+        f"STRICT LENGTH RULES (MANDATORY): "
+        f"- TOTAL WORD COUNT: 32 to 36 words ONLY. "
+        f"- Short sentences. Max 7–8 words per sentence. "
+
+        f"Structure: "
+        f"1. HOOK (0–3 sec): A blunt truth that stops lost men from scrolling. No hype. "
+        f"2. BODY (3–13 sec): One clear principle linking discipline, faith, and masculinity. "
+        f"   Speak as guidance, not preaching. Short sentences. No clichés. "
+        f"3. CLOSE (last 2 sec): A direct command that builds habit and continuity: "
+        f"   'Roz aisi yaad ke liye follow karo.' "
+
+        f"Rules: "
+        f"- Do NOT exceed 36 words total. "
+        f"- Do NOT include emojis. "
+        f"- Do NOT mention motivation, hustle, trends, or social media. "
+        f"- Do NOT repeat phrases between scripts or from earlier scripts. "
+        f"- Make it sound lived-in, not generated. "
+
+        f"Output format: STRICT JSON ONLY - an array with exactly {len(themes)} objects, "
+        f"in theme order, each with keys: "
+        f"'hindi_quote', 'english_translation', 'caption', 'hashtags'. "
+    )
+
+
+def validate_script(script):
+    """
+    Check a generated script.
+
+    Returns:
+        None if it is usable, else the reason it was rejected
+    """
+    if not isinstance(script, dict):
+        return "not a JSON object"
+    missing = [field for field in REQUIRED_FIELDS if field not in script]
+    if missing:
+        return f"missing fields: {', '.join(missing)}"
+    empty = [field for field in REQUIRED_FIELDS
+             if not isinstance(script[field], str) or not script[field].strip()]
+    if empty:
+        return f"empty fields: {', '.join(empty)}"
+    if not _DEVANAGARI.search(script['hindi_quote']):
+        return "hindi_quote is not in Devanagari"
+    return None
+
+
+def generate_scripts(count=BACKLOG_BATCH_SIZE, themes=None, provider=None):
+    """
+    Generate a batch of scripts with a single Gemini request.
+
+    Args:
+        count: Number of scripts to ask for
+        themes: Themes to use (default: `count` themes drawn from THEMES)
+        provider: Content provider (default: live Gemini)
+
+    Returns:
+        List of valid scripts (invalid ones are dropped with a warning)
+    """
+    if themes is None:
+        pool = THEMES * (count // len(THEMES) + 1)
+        themes = random.sample(pool, count)
+
+    content = json.loads((provider or _live_provider).generate(build_prompt(themes)))
+    if isinstance(content, dict):
+        content = [content]
+    if not isinstance(content, list):
+        raise ValueError(f"❌ Gemini returned {type(content).__name__}, expected a JSON array")
+
+    scripts = []
+    for i, script in enumerate(content):
+        problem = validate_script(script)
+        if problem:
+            print(f"   ⚠️ Dropped generated script {i + 1}: {problem}")
+            continue
+        script = {field: script[field] for field in REQUIRED_FIELDS}
+        script['theme'] = themes[i] if i < len(themes) else None
+        script['generated_at'] = int(time.time())
+        scripts.append(script)
+    return scripts
+
+
+class ContentBacklog:
+    """
+    Local queue of validated scripts stored in .cache/content_backlog.json.
+
+    Safe to use from the posting thread and the background refill thread
+    at the same time. With a ScriptIndex, near-duplicates of posted scripts
+    (or of each other within one batch) are never queued or handed out, and
+    every script passed to mark_posted is indexed.
+    """
+
+    def __init__(self, path=BACKLOG_FILE, min_size=BACKLOG_MIN_SIZE, batch_size=BACKLOG_BATCH_SIZE,
+                 index=None, provider=None):
+        self.path = path
+        self.min_size = min_size
+        self.batch_size = batch_size
+        self.index = index
+        self.provider = provider
+        self._lock = threading.Lock()
+        self._refill_thread = None
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                scripts = json.load(f)
+            return scripts if isinstance(scripts, list) else []
+        except (OSError, ValueError):
+            return []
+
+    def _save(self, scripts):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(scripts, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+    def push(self, scripts):
+        """Append validated scripts to the queue"""
+        with self._lock:
+            queue = self._load()
+            queue.extend(scripts)
+            self._save(queue)
+            return len(queue)
+
+    def peek(self):
+        """The oldest script, left in the queue (None if empty)"""
+        with self._lock:
+            queue = self._load()
+            return queue[0] if queue else None
+
+    def remove(self, script):
+        """Drop a script from the queue; returns False if it was not queued"""
+        with self._lock:
+            queue = self._load()
+            if script not in queue:
+                return False
+            queue.remove(script)
+            self._save(queue)
+            return True
+
+    def _is_repeat(self, script, index=None):
+        if index is None:
+            index = self.index
+        if index is None:
+            return False
+        score, match = index.best_match(script['hindi_quote'])
+        if score < self.index.threshold:
+            return False
+        print(f"   🔁 Skipped near-duplicate script ({score:.0%} similar to: {match[:30]}...)")
+        return True
+
+    def refill(self):
+        """Generate one batch and queue it; returns the number of scripts added"""
+        scripts = generate_scripts(self.batch_size, provider=self.provider)
+        if self.index is not None:
+            # Scripts accepted so far from this batch (in memory, not the posted archive)
+            batch = ScriptIndex(path=None, threshold=self.index.threshold)
+            accepted = []
+            for script in scripts:
+                if self._is_repeat(script) or self._is_repeat(script, batch):
+                    continue
+                batch.add(script['hindi_quote'])
+                accepted.append(script)
+            scripts = accepted
+        self.push(scripts)
+        return len(scripts)
+
+    def refill_in_background(self):
+        """
+        Start a refill thread if the queue is below the threshold.
+
+        The thread is not a daemon, so a short-lived process waits for it
+        before exiting (by then the reel has usually been rendered and posted).
+        """
+        if len(self) >= self.min_size:
+            return None
+        if self._refill_thread is not None and self._refill_thread.is_alive():
+            return self._refill_thread
+
+        def run():
+            try:
+                added = self.refill()
+                print(f"\n📚 Content backlog refilled: +{added} scripts ({len(self)} queued)")
+            except Exception as e:
+                print(f"\n⚠️ Content backlog refill failed: {e}")
+
+        self._refill_thread = threading.Thread(target=run, name="backlog-refill")
+        self._refill_thread.start()
+        return self._refill_thread
+
+    def next_script(self):
+        """
+        Script for this run: the oldest queued one, or generated on the spot
+        when the queue is empty. It stays queued until mark_posted(), so
+        renders that are never posted do not use it up. Near-duplicates of
+        posted scripts are dropped. Starts a background refill when running low.
+        """
+        refills = 0
+        while True:
+            script = self.peek()
+            if script is None:
+                if refills == MAX_SYNC_REFILLS:
+                    raise ValueError("❌ Gemini returned no valid, unique scripts")
+                print("   Backlog empty - generating a batch now")
+                self.refill()
+                refills += 1
+                continue
+            # Queued scripts are re-checked: others may have been posted since
+            if not self._is_repeat(script):
+                break
+            self.remove(script)
+
+        self.refill_in_background()
+        return script
+
+    def mark_posted(self, script):
+        """Take a script that went online off the queue and index it"""
+        self.remove(script)
+        if self.index is not None:
+            self.index.add(script['hindi_quote'])
+
+
+if __name__ == "__main__":
+    from script_index import ScriptIndex
+    backlog = ContentBacklog(index=ScriptIndex())
+    print(f"📚 {len(backlog)} scripts queued in {BACKLOG_FILE}")
+    added = backlog.refill()
+    print(f"✅ Added {added} scripts ({len(backlog)} queued)")
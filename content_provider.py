@@ -0,0 +1,151 @@
+"""
+📼 Content Providers
+=====================
+Where script generation gets its Gemini responses from:
+- GeminiProvider: the live API
+- RecordingProvider: wraps another provider and saves every prompt,
+  response and latency to a cassette file (JSONL), plus the run's seed
+- ReplayProvider: serves a cassette back in order, without any network,
+  with no delay or the recorded latencies
+- Record and replay runs seed `random` with the cassette's seed, so themes,
+  images, looks and motions are picked the same way every time
+
+Record once with network access, then run the whole pipeline offline with
+stable timings: python main.py --content replay
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import zlib
+
+# --- Configuration ---
+GEMINI_MODEL = "gemini-2.5-flash"  # Better rate limits than exp
+GEMINI_TEMPERATURE = 0.9           # High creativity while staying within limits
+PROVIDER_MODES = ("live", "record", "replay")
+DEFAULT_PROVIDER = os.getenv("CONTENT_PROVIDER", "live")
+DEFAULT_CASSETTE = os.getenv("CONTENT_CASSETTE", os.path.join("cassettes", "gemini.jsonl"))
+
+
+class GeminiProvider:
+    """Live Gemini API (one client per provider, created on first use)"""
+
+    def __init__(self, model=GEMINI_MODEL, temperature=GEMINI_TEMPERATURE):
+        self.model = model
+        self.temperature = temperature
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                api_key = os.getenv("GOOGLE_API_KEY")
+                if not api_key:
+                    raise ValueError("❌ GOOGLE_API_KEY missing in .env file!")
+                from google import genai
+                self._client = genai.Client(api_key=api_key)
+            return self._client
+
+    def generate(self, prompt):
+        """Send a prompt and return the response text (JSON)"""
+        from google.genai import types
+
+        response = self._get_client().models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                temperature=self.temperature
+            )
+        )
+        return response.text
+
+
+class RecordingProvider:
+    """
+    Pass-through to another provider that appends each exchange to a cassette.
+
+    `seed` is stored with every exchange; seed `random` with it before
+    generating so a replay of the cassette makes the same random choices.
+    """
+
+    def __init__(self, provider, cassette=DEFAULT_CASSETTE):
+        self.provider = provider
+        self.cassette = cassette
+        self.seed = random.randrange(2 ** 32)
+        self._lock = threading.Lock()
+
+    def generate(self, prompt):
+        start = time.perf_counter()
+        text = self.provider.generate(prompt)
+        latency = time.perf_counter() - start
+
+        with self._lock:
+            os.makedirs(os.path.dirname(self.cassette) or ".", exist_ok=True)
+            with open(self.cassette, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"prompt": prompt, "response": text, "latency": round(latency, 3),
+                                    "seed": self.seed}, ensure_ascii=False) + "\n")
+        print(f"   📼 Recorded Gemini response ({latency:.1f}s) to {self.cassette}")
+        return text
+
+
+class ReplayProvider:
+    """
+    Serves the responses of a cassette in recorded order.
+
+    Prompts contain a session timestamp, so responses are matched by
+    position, not by prompt text. `seed` is the seed of the recorded run
+    (cassettes from before seeds were stored get one derived from their
+    first response).
+    """
+
+    def __init__(self, cassette=DEFAULT_CASSETTE, replay_latency=False):
+        self.cassette = cassette
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._position = 0
+        try:
+            with open(cassette, "r", encoding="utf-8") as f:
+                self._entries = [json.loads(line) for line in f if line.strip()]
+        except OSError:
+            raise ValueError(f"❌ Cassette not found: {cassette} (record one with --content record)")
+        if not self._entries:
+            raise ValueError(f"❌ Cassette is empty: {cassette}")
+        first = self._entries[0]
+        self.seed = first.get("seed", zlib.crc32(first["response"].encode("utf-8")))
+
+    def generate(self, prompt):
+        with self._lock:
+            if self._position == len(self._entries):
+                raise ValueError(f"❌ Cassette exhausted after {len(self._entries)} response(s): {self.cassette}")
+            entry = self._entries[self._position]
+            self._position += 1
+        if self.replay_latency:
+            time.sleep(entry.get("latency", 0))
+        return entry["response"]
+
+
+def get_provider(mode=None, cassette=None, replay_latency=False):
+    """
+    Build a content provider.
+
+    Args:
+        mode: "live", "record" or "replay" (default: CONTENT_PROVIDER or live)
+        cassette: Cassette file for record/replay (default: CONTENT_CASSETTE)
+        replay_latency: Replay sleeps for the recorded API latency
+
+    Returns:
+        Object with generate(prompt) -> response text (record/replay
+        providers also have a `seed` for `random`)
+    """
+    mode = mode or DEFAULT_PROVIDER
+    cassette = cassette or DEFAULT_CASSETTE
+    if mode == "live":
+        return GeminiProvider()
+    if mode == "record":
+        return RecordingProvider(GeminiProvider(), cassette)
+    if mode == "replay":
+        return ReplayProvider(cassette, replay_latency)
+    raise ValueError(f"❌ Unknown content provider '{mode}'. Use one of: {', '.join(PROVIDER_MODES)}")
@@ -0,0 +1,175 @@
+"""
+🗄️ Persistent Disk Cache
+=========================
+Small helpers for the on-disk caches under .cache/:
+- DiskCache: size-bounded LRU store of numpy arrays / files in one folder
+- file_digest: content hash of a file, memoized by (size, mtime) in a
+  SQLite table so unchanged files are never re-read; each new digest is
+  one row, and concurrent processes do not overwrite each other
+  (library images use the sha1 already stored by image_library.py)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+# --- Configuration ---
+CACHE_DIR = ".cache"
+HASH_DB = os.path.join(CACHE_DIR, "file_hashes.sqlite")
+
+_hash_lock = threading.Lock()
+_hash_memo = {}  # path -> (size, mtime_ns, digest), for this process
+
+
+def _hash_db():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(HASH_DB, timeout=30)
+    conn.execute("""CREATE TABLE IF NOT EXISTS file_hashes (
+                        path TEXT PRIMARY KEY,
+                        file_size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        sha1 TEXT NOT NULL)""")
+    return conn
+
+
+def file_digest(path):
+    """
+    Return the SHA-1 of a file's contents.
+
+    The digest is remembered together with the file's size and mtime, so it
+    is only recomputed when the file actually changes.
+    """
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    key = os.path.abspath(path)
+
+    with _hash_lock:
+        entry = _hash_memo.get(key)
+    if entry and entry[:2] == stamp:
+        return entry[2]
+
+    conn = _hash_db()
+    try:
+        row = conn.execute("SELECT file_size, mtime_ns, sha1 FROM file_hashes WHERE path = ?",
+                           (key,)).fetchone()
+        if row and tuple(row[:2]) == stamp:
+            digest = row[2]
+        else:
+            sha = hashlib.sha1()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)", (key, *stamp, digest))
+    finally:
+        conn.close()
+
+    with _hash_lock:
+        _hash_memo[key] = stamp + (digest,)
+    return digest
+
+
+def make_key(*parts):
+    """Stable cache key from any JSON-serializable parts"""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """
+    Size-bounded LRU cache of files in .cache/<name>/.
+
+    Entries are plain files named after their key. A hit refreshes the
+    file's mtime, and when the folder grows past `max_mb` the least
+    recently used files are deleted.
+    """
+
+    def __init__(self, name, max_mb=1024):
+        self.dir = os.path.join(CACHE_DIR, name)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    def path(self, key, ext=".npy"):
+        return os.path.join(self.dir, key + ext)
+
+    def lookup(self, key, ext=".npy"):
+        """Return the entry's path (marking it as recently used) or None"""
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, key, write_fn, ext=".npy"):
+        """
+        Create an entry atomically.
+
+        Args:
+            key: Cache key
+            write_fn: Callable that writes the entry to the path it is given
+            ext: File extension of the entry
+
+        Returns:
+            Path of the stored entry
+        """
+        os.makedirs(self.dir, exist_ok=True)
+        path = self.path(key, ext)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write_fn(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+        return path
+
+    def load_array(self, key, mmap=False):
+        """Return a cached numpy array or None"""
+        path = self.lookup(key)
+        if path is None:
+            return None
+        try:
+            return np.load(path, mmap_mode="r" if mmap else None)
+        except (OSError, ValueError):
+            # Truncated/corrupt entry - drop it and rebuild
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Already removed (e.g. by another job) or not removable
+            return None
+
+    def save_array(self, key, array):
+        """Store a numpy array and return its path"""
+        def write(tmp_path):
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(array))
+        return self.store(key, write)
+
+    def evict(self):
+        """Delete least recently used entries until the folder fits max_mb"""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.dir):
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
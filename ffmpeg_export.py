@@ -0,0 +1,318 @@
+"""
+💾 Direct ffmpeg Export Backend
+================================
+Streams a finished timeline straight into one ffmpeg process:
+- Video frames go to ffmpeg's stdin as raw rgb24, written from a
+  background thread so the next frame renders while ffmpeg ingests
+- Frames of full-size, unmasked clips are sent as-is (no compose canvas)
+- Audio is fed as a 16-bit PCM stream through a second pipe input,
+  so no intermediate audio file is written
+- Separately encoded segments can be joined with the concat demuxer
+  (stream copy) while the audio is muxed in
+"""
+
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import wave
+
+import numpy as np
+
+# --- Configuration ---
+AUDIO_FPS = 44100
+AUDIO_CHUNK = 50000  # Samples per PCM chunk
+FRAME_QUEUE = 4      # Frames rendered ahead of ffmpeg
+
+
+def _ffmpeg_exe():
+    from imageio_ffmpeg import get_ffmpeg_exe
+    return get_ffmpeg_exe()
+
+
+def frame_times(duration, fps):
+    """Frame timestamps, identical to moviepy's iter_frames()"""
+    return np.arange(0, duration, 1.0 / fps)
+
+
+def _direct_layers(clip):
+    """
+    Return the sub-clips of a composed timeline if every one of them can
+    be sent to ffmpeg as-is (same size as the frame, no mask), else None.
+    """
+    layers = getattr(clip, 'clips', None)
+    if not layers:
+        return None
+    for layer in layers:
+        if layer.mask is not None or tuple(layer.size) != tuple(clip.size):
+            return None
+    return layers
+
+
+def iter_timeline_frames(clip, fps):
+    """
+    Yield (t, frame) for every output frame of `clip`.
+
+    For a concatenate_videoclips(method="compose") timeline whose clips all
+    fill the frame, the visible clip's frame is returned directly instead
+    of being blitted onto a fresh canvas.
+    """
+    layers = _direct_layers(clip)
+
+    for t in frame_times(clip.duration, fps):
+        frame = None
+        if layers is not None:
+            active = [c for c in layers if c.start <= t and (c.end is None or t < c.end)]
+            if len(active) == 1:
+                frame = active[0].get_frame(t - active[0].start)
+        if frame is None:
+            frame = clip.get_frame(t)
+        if frame.dtype != np.uint8:
+            frame = frame.astype(np.uint8)
+        yield t, frame
+
+
+def iter_pcm_chunks(audio, duration, fps=AUDIO_FPS):
+    """Yield the clip's audio as interleaved int16 PCM byte chunks"""
+    if audio.duration is not None and audio.duration > duration:
+        audio = audio.subclip(0, duration)
+    array = getattr(audio, 'array', None)
+    if array is not None and getattr(audio, 'fps', None) == fps:
+        # Already in memory (AudioArrayClip) - just slice it
+        total = int(fps * audio.duration)
+        pcm = (np.clip(array[:total], -1.0, 1.0) * 32767).astype(np.int16)
+        for start in range(0, len(pcm), AUDIO_CHUNK):
+            yield pcm[start:start + AUDIO_CHUNK].tobytes()
+        return
+
+    for chunk in audio.iter_chunks(fps=fps, quantize=True, nbytes=2, chunksize=AUDIO_CHUNK):
+        yield np.ascontiguousarray(chunk, dtype=np.int16).tobytes()
+
+
+def _audio_channels(audio):
+    array = getattr(audio, 'array', None)
+    if array is not None:
+        return array.shape[1] if array.ndim > 1 else 1
+    return getattr(audio, 'nchannels', 2)
+
+
+class PcmInput:
+    """
+    Audio handed to ffmpeg as an extra input without an encoded temp file.
+
+    On POSIX the PCM goes through an inherited pipe (`pipe:N`) fed by a
+    background thread. Windows can't hand extra pipes to a child process,
+    so there the PCM is written to an uncompressed temporary WAV instead.
+    """
+
+    def __init__(self, audio, duration, fps=AUDIO_FPS):
+        self.audio = audio
+        self.duration = duration
+        self.fps = fps
+        self.errors = []
+        self.pass_fds = ()
+        self._read_fd = self._write_fd = None
+        self._wav_path = None
+        self._thread = None
+
+    def input_args(self):
+        """ffmpeg arguments declaring this input"""
+        channels = _audio_channels(self.audio)
+        if sys.platform != 'win32':
+            self._read_fd, self._write_fd = os.pipe()
+            self.pass_fds = (self._read_fd,)
+            return ['-f', 's16le', '-ar', str(self.fps), '-ac', str(channels), '-i', f'pipe:{self._read_fd}']
+
+        fd, self._wav_path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        with wave.open(self._wav_path, 'wb') as wav:
+            wav.setnchannels(channels)
+            wav.setsampwidth(2)
+            wav.setframerate(self.fps)
+            for chunk in iter_pcm_chunks(self.audio, self.duration, self.fps):
+                wav.writeframes(chunk)
+        return ['-i', self._wav_path]
+
+    def start(self):
+        """Start feeding PCM once ffmpeg has been spawned"""
+        if self._read_fd is None:
+            return
+        os.close(self._read_fd)
+
+        def feed():
+            try:
+                with os.fdopen(self._write_fd, 'wb') as pipe:
+                    for chunk in iter_pcm_chunks(self.audio, self.duration, self.fps):
+                        pipe.write(chunk)
+            except Exception as e:
+                self.errors.append(e)
+
+        self._thread = threading.Thread(target=feed, daemon=True)
+        self._thread.start()
+
+    def finish(self):
+        if self._thread is not None:
+            self._thread.join()
+        if self._wav_path and os.path.exists(self._wav_path):
+            os.remove(self._wav_path)
+
+
+def video_codec_args(size, codec='libx264', preset='medium', crf=None, threads=None):
+    """Encoder arguments shared by every video written by this module"""
+    args = ['-vcodec', codec, '-preset', preset]
+    if crf is not None:
+        args += ['-crf', str(crf)]
+    if threads is not None:
+        args += ['-threads', str(threads)]
+    if codec == 'libx264' and size[0] % 2 == 0 and size[1] % 2 == 0:
+        args += ['-pix_fmt', 'yuv420p']
+    return args
+
+
+def _audio_codec_args(audio_codec, audio_bitrate):
+    args = ['-acodec', audio_codec]
+    if audio_bitrate:
+        args += ['-b:a', audio_bitrate]
+    return args
+
+
+def _raise_on_failure(stderr_file, returncode, errors, output_path):
+    stderr_file.seek(0)
+    log = stderr_file.read().decode(errors='replace').strip()
+    stderr_file.close()
+    if returncode != 0 or errors:
+        detail = log or (str(errors[0]) if errors else f"exit code {returncode}")
+        raise IOError(f"ffmpeg export failed for {output_path}: {detail}")
+
+
+def write_video_ffmpeg(clip, output_path, fps=30, codec='libx264', preset='medium',
+                       threads=None, crf=None, audio_codec='aac', audio_bitrate=None,
+                       audio_fps=AUDIO_FPS, with_audio=True, tap=None):
+    """
+    Encode a clip (and its audio) with a single ffmpeg process.
+
+    Args:
+        clip: Final video clip (audio taken from clip.audio)
+        output_path: Output file path
+        fps: Output frame rate
+        codec: Video codec (default: libx264)
+        preset: x264 preset
+        threads: Encoder threads (None = ffmpeg default)
+        crf: x264 constant rate factor (None = encoder default)
+        audio_codec: Audio codec (default: aac)
+        audio_bitrate: Audio bitrate, e.g. "192k" (None = encoder default)
+        audio_fps: Audio sample rate
+        with_audio: Set to False to write the video stream only
+        tap: Optional frame tap; tap.observe(t, frame) sees every frame
+
+    Returns:
+        Path to the written file
+    """
+    w, h = clip.size
+    cmd = [_ffmpeg_exe(), '-y', '-loglevel', 'error',
+           '-f', 'rawvideo', '-vcodec', 'rawvideo',
+           '-s', f'{w}x{h}', '-pix_fmt', 'rgb24', '-r', f'{fps:.02f}', '-i', '-']
+
+    pcm = PcmInput(clip.audio, clip.duration, audio_fps) if with_audio and clip.audio is not None else None
+    if pcm is not None:
+        cmd += pcm.input_args()
+        cmd += ['-map', '0:v', '-map', '1:a'] + _audio_codec_args(audio_codec, audio_bitrate)
+    else:
+        cmd += ['-an']
+    cmd += video_codec_args((w, h), codec, preset, crf, threads)
+    cmd += [output_path]
+
+    stderr_file = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                            stderr=stderr_file, pass_fds=pcm.pass_fds if pcm else ())
+    if pcm is not None:
+        pcm.start()
+
+    errors = []
+
+    def feed_video(frames):
+        try:
+            while True:
+                frame = frames.get()
+                if frame is None:
+                    break
+                proc.stdin.write(memoryview(np.ascontiguousarray(frame)).cast('B'))
+        except Exception as e:
+            errors.append(e)
+            # Keep draining so the producer never blocks on a dead pipe
+            while frames.get() is not None:
+                pass
+
+    frames = queue.Queue(maxsize=FRAME_QUEUE)
+    feeder = threading.Thread(target=feed_video, args=(frames,), daemon=True)
+    feeder.start()
+
+    try:
+        for t, frame in iter_timeline_frames(clip, fps):
+            if errors:
+                break
+            if tap is not None:
+                tap.observe(t, frame)
+            frames.put(frame)
+    finally:
+        frames.put(None)
+        feeder.join()
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        if pcm is not None:
+            pcm.finish()
+            errors += pcm.errors
+        returncode = proc.wait()
+
+    _raise_on_failure(stderr_file, returncode, errors, output_path)
+    return output_path
+
+
+def concat_segments_ffmpeg(segment_paths, output_path, audio=None, duration=None,
+                           audio_codec='aac', audio_bitrate=None, audio_fps=AUDIO_FPS):
+    """
+    Join encoded segments with the concat demuxer (stream copy, no re-encode)
+    and mux the audio in the same pass.
+
+    Args:
+        segment_paths: Video-only segments encoded with identical settings, in order
+        output_path: Output file path
+        audio: Audio clip for the whole timeline (or None)
+        duration: Timeline duration in seconds (needed with audio)
+        audio_codec: Audio codec (default: aac)
+        audio_bitrate: Audio bitrate (None = encoder default)
+        audio_fps: Audio sample rate
+
+    Returns:
+        Path to the written file
+    """
+    fd, list_path = tempfile.mkstemp(suffix='.txt', dir=os.path.dirname(os.path.abspath(output_path)))
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    cmd = [_ffmpeg_exe(), '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+    pcm = PcmInput(audio, duration, audio_fps) if audio is not None else None
+    if pcm is not None:
+        cmd += pcm.input_args()
+        cmd += ['-map', '0:v', '-map', '1:a'] + _audio_codec_args(audio_codec, audio_bitrate)
+    cmd += ['-c:v', 'copy', output_path]
+
+    stderr_file = tempfile.TemporaryFile()
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=stderr_file, pass_fds=pcm.pass_fds if pcm else ())
+        if pcm is not None:
+            pcm.start()
+            pcm.finish()
+        returncode = proc.wait()
+    finally:
+        os.remove(list_path)
+
+    _raise_on_failure(stderr_file, returncode, pcm.errors if pcm else [], output_path)
+    return output_path
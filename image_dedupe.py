@@ -0,0 +1,157 @@
+"""
+🧬 Image Near-Duplicate Detection
+==================================
+Perceptual hashes for the image library, so re-saves and re-scrapes of the
+same picture are recognized:
+- dHash: 64 bits from comparing neighbouring pixels of a 9x8 grayscale
+  thumbnail, computed for whole batches at once with numpy
+- Hashes live in the image library index and are only computed for new or
+  changed files
+- A BK-tree finds every hash within a Hamming distance without comparing
+  against the whole library
+- Command line report of duplicate clusters: python image_dedupe.py
+"""
+
+import os
+
+import numpy as np
+from PIL import Image
+
+# --- Configuration ---
+HASH_SIZE = 8  # 8x8 comparisons = 64-bit hash
+DUPLICATE_DISTANCE = int(os.getenv("IMAGE_DUPLICATE_DISTANCE", "6"))  # Max differing bits for a duplicate
+
+
+def dhash_thumbnail(gray):
+    """(HASH_SIZE, HASH_SIZE + 1) luma array of a grayscale PIL image"""
+    small = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+    return np.asarray(small, dtype=np.int16)
+
+
+def dhash_batch(thumbnails):
+    """
+    dHash of many thumbnails in one vectorized pass.
+
+    Args:
+        thumbnails: Arrays from dhash_thumbnail(), or an (N, 8, 9) array
+
+    Returns:
+        uint64 array of N hashes
+    """
+    stack = np.asarray(thumbnails, dtype=np.int16).reshape(-1, HASH_SIZE, HASH_SIZE + 1)
+    bits = stack[:, :, 1:] > stack[:, :, :-1]                   # (N, 8, 8)
+    packed = np.packbits(bits.reshape(len(stack), -1), axis=1)  # (N, 8) bytes, big-endian
+    return packed.view(">u8").ravel().astype(np.uint64)
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes"""
+    return (int(a) ^ int(b)).bit_count()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over Hamming distance.
+
+    A search with radius r only descends into children whose edge distance
+    is within r of the query's distance to the node.
+    """
+
+    def __init__(self):
+        self._root = None  # [hash, items, {distance: child}]
+        self.size = 0
+
+    def add(self, value, item):
+        value = int(value)
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """All (distance, item) within `radius` bits of `value`"""
+        value = int(value)
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.extend((distance, item) for item in node[1])
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return found
+
+
+def duplicate_clusters(hashes, radius=DUPLICATE_DISTANCE):
+    """
+    Group items whose hashes are within `radius` bits (transitively).
+
+    Args:
+        hashes: {item: hash}
+        radius: Max differing bits
+
+    Returns:
+        List of clusters (sorted lists of items), largest first; only
+        clusters with at least two items
+    """
+    tree = BKTree()
+    for item, value in hashes.items():
+        tree.add(value, item)
+
+    parent = {item: item for item in hashes}
+
+    def find(item):
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for item, value in hashes.items():
+        for _, other in tree.search(value, radius):
+            root_a, root_b = find(item), find(other)
+            if root_a != root_b:
+                parent[root_b] = root_a
+
+    clusters = {}
+    for item in hashes:
+        clusters.setdefault(find(item), []).append(item)
+    groups = [sorted(group) for group in clusters.values() if len(group) > 1]
+    return sorted(groups, key=lambda group: (-len(group), group[0]))
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from image_library import ImageLibrary
+
+    parser = argparse.ArgumentParser(description="List near-duplicate clusters in the image library")
+    parser.add_argument("--images", default="images", help="Image folder")
+    parser.add_argument("--distance", type=int, default=DUPLICATE_DISTANCE,
+                        help="Max differing dHash bits (of 64) for a duplicate")
+    args = parser.parse_args()
+
+    library = ImageLibrary(args.images)
+    start = time.time()
+    added, removed = library.sync()
+    hashes = library.perceptual_hashes()
+    clusters = duplicate_clusters(hashes, args.distance)
+    print(f"🧬 {len(hashes)} images ({added} newly hashed) in {time.time() - start:.2f}s: "
+          f"{len(clusters)} duplicate cluster(s) within {args.distance} bits")
+    for i, cluster in enumerate(clusters, 1):
+        print(f"\n   Cluster {i} ({len(cluster)} images):")
+        for name in cluster:
+            print(f"      {name}")
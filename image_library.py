@@ -0,0 +1,299 @@
+"""
+🗂️ Image Library Index
+=======================
+Persistent SQLite index of the images/ folder:
+- One row per image: dimensions, aspect ratio, content hash, size/mtime,
+  blur score (Laplacian variance), perceptual hash (dHash, image_dedupe.py)
+  and when it was last used in a reel
+- Updated incrementally: only new or changed files are opened, deleted
+  files are dropped; perceptual hashes are computed per batch. Unreadable
+  files are remembered by size/mtime and only retried once they change
+- Selection reads images not used within REUSE_COOLDOWN_DAYS through the
+  last_used index (recently used ones only when there are not enough),
+  skips images that are too small or too blurry and refuses
+  near-duplicates of an image already picked
+- Random picks follow the `random` module's state, so seeded runs repeat
+- Images count as used once their reel is posted (mark_used); jobs sharing
+  one ImageLibrary (batch_render.py) are handed different images
+"""
+
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+from disk_cache import CACHE_DIR
+from image_dedupe import dhash_thumbnail, dhash_batch, hamming, DUPLICATE_DISTANCE
+
+# --- Configuration ---
+LIBRARY_DB = os.path.join(CACHE_DIR, "image_library.sqlite")
+IMAGE_EXTENSIONS = ('.jpg', '.png', '.jpeg')
+MIN_IMAGE_SIDE = int(os.getenv("MIN_IMAGE_SIDE", "480"))         # Shorter side in pixels
+MIN_SHARPNESS = float(os.getenv("MIN_IMAGE_SHARPNESS", "0"))     # Laplacian variance, 0 = no limit
+REUSE_COOLDOWN_DAYS = float(os.getenv("REUSE_COOLDOWN_DAYS", "3"))
+BLUR_SAMPLE_SIZE = 512  # Longest side the blur score is measured at
+SYNC_BATCH = 256        # Images analyzed (and perceptually hashed) per batch
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    name TEXT PRIMARY KEY,
+    file_size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    min_side INTEGER NOT NULL,
+    aspect REAL NOT NULL,
+    sha1 TEXT NOT NULL,
+    sharpness REAL NOT NULL,
+    last_used REAL NOT NULL DEFAULT 0,
+    dhash INTEGER
+);
+CREATE INDEX IF NOT EXISTS images_usable ON images (min_side, sharpness, last_used);
+CREATE INDEX IF NOT EXISTS images_last_used ON images (last_used, min_side, sharpness);
+CREATE TABLE IF NOT EXISTS unreadable (
+    name TEXT PRIMARY KEY,
+    file_size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+@contextmanager
+def _connect(db_path):
+    """Connection that commits on success and is always closed"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.executescript(_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(images)")}
+        if "dhash" not in columns:
+            conn.execute("ALTER TABLE images ADD COLUMN dhash INTEGER")  # Index from before dHash
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _to_sql(value):
+    """uint64 hash -> SQLite's signed 64-bit INTEGER"""
+    value = int(value)
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _from_sql(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def blur_score(gray):
+    """Variance of the Laplacian of a downscaled grayscale image (low = blurry)"""
+    luma = np.asarray(gray, dtype=np.float32)
+    if luma.shape[0] < 3 or luma.shape[1] < 3:
+        return 0.0
+    laplacian = (luma[1:-1, :-2] + luma[1:-1, 2:] + luma[:-2, 1:-1] + luma[2:, 1:-1]
+                 - 4 * luma[1:-1, 1:-1])
+    return float(laplacian.var())
+
+
+def analyze_image(path):
+    """
+    Everything the index stores about one image file.
+
+    Returns:
+        Dict with width, height, min_side, aspect, sha1, sharpness and the
+        dHash thumbnail (hashed later, together with the rest of the batch)
+    """
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    with Image.open(path) as img:
+        width, height = img.size
+        img.draft("L", (BLUR_SAMPLE_SIZE, BLUR_SAMPLE_SIZE))  # JPEG: decode at reduced scale
+        gray = img.convert("L")
+    gray.thumbnail((BLUR_SAMPLE_SIZE, BLUR_SAMPLE_SIZE))
+    return {
+        "width": width,
+        "height": height,
+        "min_side": min(width, height),
+        "aspect": width / height,
+        "sha1": sha.hexdigest(),
+        "sharpness": blur_score(gray),
+        "thumbnail": dhash_thumbnail(gray),
+    }
+
+
+class ImageLibrary:
+    """SQLite index over the images in one folder"""
+
+    def __init__(self, images_dir, db_path=LIBRARY_DB):
+        self.images_dir = images_dir
+        self.db_path = db_path
+        # Names returned by select(), so jobs sharing this library get different images
+        self._handed_out = set()
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """
+        Bring the index up to date with the folder.
+
+        Returns:
+            (added_or_changed, removed) counts
+        """
+        on_disk = {}
+        with os.scandir(self.images_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    st = entry.stat()
+                    on_disk[entry.name] = (st.st_size, st.st_mtime_ns)
+
+        with _connect(self.db_path) as conn:
+            indexed = {name: (size, mtime) if dhash is not None else None
+                       for name, size, mtime, dhash
+                       in conn.execute("SELECT name, file_size, mtime_ns, dhash FROM images")}
+            unreadable = {name: (size, mtime) for name, size, mtime
+                          in conn.execute("SELECT name, file_size, mtime_ns FROM unreadable")}
+
+            removed = [name for name in indexed.keys() | unreadable.keys() if name not in on_disk]
+            conn.executemany("DELETE FROM images WHERE name = ?", [(name,) for name in removed])
+            conn.executemany("DELETE FROM unreadable WHERE name = ?", [(name,) for name in removed])
+
+            # New, modified, or indexed before perceptual hashes existed
+            changed = [name for name, stamp in on_disk.items()
+                       if indexed.get(name) != stamp and unreadable.get(name) != stamp]
+            for start in range(0, len(changed), SYNC_BATCH):
+                rows = []
+                for name in changed[start:start + SYNC_BATCH]:
+                    size, mtime = on_disk[name]
+                    try:
+                        info = analyze_image(os.path.join(self.images_dir, name))
+                    except Exception as e:
+                        # Not opened again until the file changes
+                        print(f"   ⚠️ Skipping unreadable image {name}: {e}")
+                        conn.execute("INSERT OR REPLACE INTO unreadable VALUES (?, ?, ?)", (name, size, mtime))
+                        continue
+                    rows.append(dict(info, name=name, file_size=size, mtime_ns=mtime))
+                if not rows:
+                    continue
+                conn.executemany("DELETE FROM unreadable WHERE name = ?", [(row["name"],) for row in rows])
+                hashes = dhash_batch([row.pop("thumbnail") for row in rows])
+                for row, value in zip(rows, hashes):
+                    row["dhash"] = _to_sql(value)
+                # A changed file keeps its last_used; a new one starts at 0
+                conn.executemany(
+                    """INSERT INTO images (name, file_size, mtime_ns, width, height, min_side, aspect, sha1,
+                                           sharpness, dhash)
+                       VALUES (:name, :file_size, :mtime_ns, :width, :height, :min_side, :aspect, :sha1,
+                               :sharpness, :dhash)
+                       ON CONFLICT(name) DO UPDATE SET
+                           file_size = excluded.file_size, mtime_ns = excluded.mtime_ns,
+                           width = excluded.width, height = excluded.height,
+                           min_side = excluded.min_side, aspect = excluded.aspect,
+                           sha1 = excluded.sha1, sharpness = excluded.sharpness,
+                           dhash = excluded.dhash""",
+                    rows)
+
+        return len(changed), len(removed)
+
+    def count(self, usable_only=False):
+        """Number of indexed images (optionally only those passing the size/blur limits)"""
+        with _connect(self.db_path) as conn:
+            if usable_only:
+                return conn.execute("SELECT COUNT(*) FROM images WHERE min_side >= ? AND sharpness >= ?",
+                                    (MIN_IMAGE_SIDE, MIN_SHARPNESS)).fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def select(self, count, min_side=MIN_IMAGE_SIDE, min_sharpness=MIN_SHARPNESS,
+               cooldown_days=REUSE_COOLDOWN_DAYS, max_distance=DUPLICATE_DISTANCE, claim=False):
+        """
+        Pick up to `count` random usable images, no two of them near-duplicates.
+
+        Candidates are taken in tiers, each shuffled with `random` (so seeded
+        runs choose the same images): images outside the cooldown first,
+        images used within it only when there are not enough of those, and
+        images this library already handed out (to another job of the same
+        batch) last. An image within `max_distance` dHash bits of one already
+        picked is skipped.
+
+        Args:
+            claim: Also mark the picked images as used, in the same write
+                transaction (BEGIN IMMEDIATE). Renders don't claim: main.py
+                calls mark_used() once the reel is actually posted
+
+        Returns:
+            List of file names
+        """
+        now = time.time()
+        cutoff = now - cooldown_days * 86400
+        picked, picked_hashes, skipped = [], [], 0
+        with self._lock:
+            with _connect(self.db_path) as conn:
+                if claim:
+                    conn.execute("BEGIN IMMEDIATE")  # Take the write lock before reading
+                # Both tiers are read through the images_last_used index (rows come
+                # back in its order, no sort); the recently used tier is only
+                # read when the fresh one runs short
+                tiers = ("last_used <= ?", "last_used > ?")
+                later = []  # Handed out by this library already
+                for tier in tiers + (None,):
+                    if tier is None:
+                        rows = later
+                    else:
+                        rows = conn.execute(
+                            f"""SELECT name, dhash FROM images
+                                WHERE {tier} AND min_side >= ? AND sharpness >= ?""",
+                            (cutoff, min_side, min_sharpness)).fetchall()
+                        random.shuffle(rows)
+                    for name, dhash in rows:
+                        if tier is not None and name in self._handed_out:
+                            later.append((name, dhash))
+                            continue
+                        if dhash is not None:
+                            value = _from_sql(dhash)
+                            if any(hamming(value, other) <= max_distance for other in picked_hashes):
+                                skipped += 1
+                                continue
+                            picked_hashes.append(value)
+                        picked.append(name)
+                        if len(picked) == count:
+                            break
+                    if len(picked) == count:
+                        break
+                if claim:
+                    conn.executemany("UPDATE images SET last_used = ? WHERE name = ?", [(now, n) for n in picked])
+            self._handed_out.update(picked)
+        if skipped:
+            print(f"   🧬 Skipped {skipped} near-duplicate image(s)")
+        return picked
+
+    def digests(self, names):
+        """{name: sha1} of indexed images (the content hash used for cache keys)"""
+        with _connect(self.db_path) as conn:
+            return {name: sha1 for name, sha1 in conn.execute(
+                f"SELECT name, sha1 FROM images WHERE name IN ({', '.join('?' * len(names))})", list(names))}
+
+    def perceptual_hashes(self):
+        """{name: dHash} for every indexed image"""
+        with _connect(self.db_path) as conn:
+            return {name: _from_sql(dhash) for name, dhash
+                    in conn.execute("SELECT name, dhash FROM images WHERE dhash IS NOT NULL")}
+
+    def mark_used(self, names, when=None):
+        """Record that these images went into a reel"""
+        when = time.time() if when is None else when
+        with _connect(self.db_path) as conn:
+            conn.executemany("UPDATE images SET last_used = ? WHERE name = ?", [(when, n) for n in names])
+
+
+if __name__ == "__main__":
+    library = ImageLibrary("images")
+    start = time.time()
+    added, removed = library.sync()
+    print(f"🗂️ Synced in {time.time() - start:.2f}s: {added} added/changed, {removed} removed")
+    print(f"   {library.count()} images indexed, {library.count(usable_only=True)} usable "
+          f"(min side {MIN_IMAGE_SIDE}px, sharpness >= {MIN_SHARPNESS})")
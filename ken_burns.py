@@ -0,0 +1,142 @@
+"""
+🎥 Ken Burns Engine
+====================
+Plans the whole zoom/pan path of an image clip up front and renders each
+output frame as a single crop-and-scale from the source image:
+- One PIL resize with a source box per frame (no full-frame rescale + re-crop)
+- Output is always exactly the target size, so compositing is a plain copy
+- Pan directions: center, left, right, up, down
+"""
+
+import math
+
+import numpy as np
+from PIL import Image
+from moviepy.editor import VideoClip
+
+# --- Configuration ---
+OUTPUT_SIZE = (1080, 1920)  # 9:16 vertical reel
+PAN_DIRECTIONS = ("center", "left", "right", "up", "down")
+PAN_SPAN = 0.5  # Fraction of the free travel the pan sweeps across
+
+# Normalized window position at the start and end of the clip (0 = left/top edge, 1 = right/bottom)
+_PAN_PATHS = {
+    "center": ((0.5, 0.5), (0.5, 0.5)),
+    "left": ((0.5 + PAN_SPAN / 2, 0.5), (0.5 - PAN_SPAN / 2, 0.5)),
+    "right": ((0.5 - PAN_SPAN / 2, 0.5), (0.5 + PAN_SPAN / 2, 0.5)),
+    "up": ((0.5, 0.5 + PAN_SPAN / 2), (0.5, 0.5 - PAN_SPAN / 2)),
+    "down": ((0.5, 0.5 - PAN_SPAN / 2), (0.5, 0.5 + PAN_SPAN / 2)),
+}
+
+
+def _to_pil(source):
+    """Accept a path, PIL Image or HxWx3 array and return an RGB PIL Image"""
+    if isinstance(source, Image.Image):
+        return source.convert('RGB') if source.mode != 'RGB' else source
+    if isinstance(source, np.ndarray):
+        return Image.fromarray(np.ascontiguousarray(source, dtype=np.uint8))
+    return Image.open(source).convert('RGB')
+
+
+def prepare_source(source, size=OUTPUT_SIZE, zoom_ratio=1.2):
+    """
+    Load the source image without resampling it.
+
+    Every output frame is a single resize from its crop box, so shrinking
+    the source first would only resample it twice. Graded frames already
+    come at the size the strongest zoom needs (video_editor.cover_size);
+    JPEG paths are decoded at the smallest draft scale that still covers
+    the frame at `zoom_ratio`.
+
+    Args:
+        source: Path, PIL Image or numpy array
+        size: Output frame size (width, height)
+        zoom_ratio: Final zoom of the clip
+
+    Returns:
+        RGB PIL Image
+    """
+    if isinstance(source, (Image.Image, np.ndarray)):
+        return _to_pil(source)
+
+    img = Image.open(source)
+    out_w, out_h = size
+    needed = max(out_w / img.width, out_h / img.height) * max(zoom_ratio, 1.0)
+    if needed < 1.0 and img.format == 'JPEG':
+        img.draft('RGB', (math.ceil(img.width * needed), math.ceil(img.height * needed)))
+    return img.convert('RGB')
+
+
+def plan_ken_burns(src_size, size=OUTPUT_SIZE, n_frames=60, zoom_ratio=1.2, pan="center"):
+    """
+    Compute the source crop box for every output frame.
+
+    At zoom 1.0 the window is the largest box with the output aspect ratio
+    that fits in the source (the usual center cover crop). The window then
+    shrinks linearly to 1/zoom_ratio of that while its position moves along
+    the pan path inside the free space around it.
+
+    Args:
+        src_size: Source image size (width, height)
+        size: Output frame size (width, height)
+        n_frames: Number of frames to plan
+        zoom_ratio: Zoom at the last frame (1.2 = 20% zoom)
+        pan: One of PAN_DIRECTIONS
+
+    Returns:
+        float64 array of shape (n_frames, 4) with (left, top, right, bottom) boxes
+    """
+    if pan not in _PAN_PATHS:
+        raise ValueError(f"Unknown pan direction '{pan}'. Use one of: {', '.join(PAN_DIRECTIONS)}")
+
+    src_w, src_h = src_size
+    out_w, out_h = size
+
+    # Base window: cover crop with the output aspect ratio
+    scale = min(src_w / out_w, src_h / out_h)
+    base_w, base_h = out_w * scale, out_h * scale
+
+    progress = np.linspace(0.0, 1.0, n_frames) if n_frames > 1 else np.zeros(1)
+    zoom = 1.0 + (zoom_ratio - 1.0) * progress
+    win_w = base_w / zoom
+    win_h = base_h / zoom
+
+    (px0, py0), (px1, py1) = _PAN_PATHS[pan]
+    pos_x = px0 + (px1 - px0) * progress
+    pos_y = py0 + (py1 - py0) * progress
+
+    # Clamp away float round-off so boxes never leave the image
+    left = np.clip(pos_x * (src_w - win_w), 0.0, None)
+    top = np.clip(pos_y * (src_h - win_h), 0.0, None)
+    win_w = np.minimum(win_w, src_w - left)
+    win_h = np.minimum(win_h, src_h - top)
+
+    return np.stack([left, top, left + win_w, top + win_h], axis=1)
+
+
+def make_ken_burns_clip(source, duration, zoom_ratio=1.2, pan="center", size=OUTPUT_SIZE, fps=30):
+    """
+    Build a clip that zooms/pans over a still image.
+
+    Args:
+        source: Path, PIL Image or numpy array of the (filtered) image
+        duration: Clip duration in seconds
+        zoom_ratio: How much to zoom (1.2 = 20% zoom)
+        pan: Pan direction (see PAN_DIRECTIONS)
+        size: Output frame size (width, height)
+        fps: Frame rate used to plan the path
+
+    Returns:
+        VideoClip of exactly `size` with the Ken Burns motion baked in
+    """
+    img = prepare_source(source, size, zoom_ratio)
+    n_frames = max(1, int(math.ceil(duration * fps)))
+    boxes = plan_ken_burns(img.size, size, n_frames, zoom_ratio, pan)
+    last = n_frames - 1
+
+    def make_frame(t):
+        index = min(last, max(0, int(round(t * fps))))
+        frame = img.resize(size, Image.BILINEAR, box=tuple(boxes[index]))
+        return np.asarray(frame)
+
+    return VideoClip(make_frame, duration=duration)
@@ -1,10 +1,12 @@
+import json
 import os
+import time
 from dotenv import load_dotenv
 from instagrapi import Client
 from instagrapi.exceptions import (
-    LoginRequired, 
-    ChallengeRequired, 
-    TwoFactorRequired, 
+    LoginRequired,
+    ChallengeRequired,
+    TwoFactorRequired,
     BadPassword
 )
 
@@ -12,66 +14,160 @@ load_dotenv()
 USERNAME = os.getenv("INSTA_USERNAME")
 PASSWORD = os.getenv("INSTA_PASSWORD")
 MANUAL_SESSION_ID = os.getenv("INSTA_SESSIONID") # Add this to your .env
+SESSION_FILE = "session.json"
+SESSION_TTL = int(os.getenv("INSTA_SESSION_TTL", str(6 * 3600)))  # Seconds a verified session is trusted
 
-def login_user():
-    cl = Client()
-    session_file = "session.json"
-    
-    # 1. Try Loading Session File
-    if os.path.exists(session_file):
+
+class SessionManager:
+    """
+    One Instagram Client (and connection pool) for the whole run.
+
+    session.json also records when the session was last verified and as
+    whom. Within SESSION_TTL the saved session is used without any check;
+    after that a single account_info() call verifies it. The session ID
+    and password logins are only used when a real API call fails with
+    LoginRequired.
+    """
+
+    def __init__(self, session_file=SESSION_FILE, ttl=SESSION_TTL):
+        self.session_file = session_file
+        self.ttl = ttl
+        self.client = None
+        self.username = None
+        self.verified_at = 0
+
+    def _save(self, cl):
+        settings = cl.get_settings()
+        settings["verified_at"] = self.verified_at
+        settings["verified_username"] = self.username
+        tmp_path = f"{self.session_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(settings, f, indent=4)
+        os.replace(tmp_path, self.session_file)
+
+    def _verified(self, cl, username):
+        self.client = cl
+        self.username = username
+        self.verified_at = time.time()
+        self._save(cl)
+        return cl
+
+    def is_fresh(self):
+        return time.time() - self.verified_at < self.ttl
+
+    def _load_session(self, cl):
+        """Saved session, verified only if the last check is older than the TTL"""
+        with open(self.session_file, "r") as f:
+            settings = json.load(f)
+        cl.set_settings(settings)
+        self.verified_at = settings.get("verified_at", 0)
+        self.username = settings.get("verified_username")
+
+        if self.username and self.is_fresh():
+            age = (time.time() - self.verified_at) / 60
+            print(f"✅ Session reused (verified {age:.0f} min ago): @{self.username}")
+            self.client = cl
+            return cl
+
+        username = cl.account_info().username
+        print(f"✅ Session Valid! Logged in as: {username}")
+        return self._verified(cl, username)
+
+    def _login_fresh(self, cl):
+        """Session ID, then password"""
+        # 2. Try Manual Session ID (Bypasses Password Block)
+        if MANUAL_SESSION_ID:
+            print("🍪 Using Session ID from .env...")
+            try:
+                cl.login_by_sessionid(MANUAL_SESSION_ID)
+                print("✅ Logged in via Session ID!")
+                return self._verified(cl, cl.username)
+            except Exception as e:
+                print(f"❌ Session ID failed: {e}")
+                print("💡 Get a fresh session ID from Instagram cookies in browser.")
+
+        # 3. Fallback to Password
+        print(f"🔐 Logging in with password...")
         try:
-            cl.load_settings(session_file)
             cl.login(USERNAME, PASSWORD)
-            print(f"✅ Session Valid! Logged in as: {cl.account_info().username}")
-            return cl
+            # VERIFY login actually worked
+            try:
+                user_info = cl.account_info()
+                print(f"✅ Password login successful! User: {user_info.username}")
+                return self._verified(cl, user_info.username)
+            except Exception as verify_error:
+                print(f"❌ Login succeeded but account access failed: {verify_error}")
+                return None
+        except TwoFactorRequired:
+            print("📱 2FA Required!")
+            code = input("Enter 2FA Code: ")
+            cl.two_factor_login(code)
+            print("✅ 2FA login successful!")
+            return self._verified(cl, cl.username)
         except Exception as e:
-            print(f"⚠️ Session invalid: {e}. Re-authenticating...")
-            # Clear corrupted session file
+            print(f"❌ Login Error: {e}")
+            print("💡 Try these fixes:")
+            print("   1. Get fresh session ID from Instagram cookies (Chrome DevTools)")
+            print("   2. Check if password is correct")
+            print("   3. Instagram might be blocking automation - wait 1 hour")
+            return None
+
+    def login(self):
+        """Logged-in Client (the same one for every call in this run), or None"""
+        if self.client is not None:
+            return self.client
+
+        cl = Client()
+
+        # 1. Try Loading Session File
+        if os.path.exists(self.session_file):
+            try:
+                return self._load_session(cl)
+            except LoginRequired as e:
+                print(f"⚠️ Session expired: {e}. Re-authenticating...")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Session file unreadable: {e}. Re-authenticating...")
+            except Exception as e:
+                # Network trouble or a challenge: the session itself may be fine
+                print(f"❌ Could not verify session: {e}")
+                return None
+            # Clear the dead session file
             try:
-                os.remove(session_file)
-                print("🗑️ Cleared corrupted session file.")
-            except:
+                os.remove(self.session_file)
+                print("🗑️ Cleared expired session file.")
+            except OSError:
                 pass
+            self.verified_at = 0
+            self.username = None
 
-    # 2. Try Manual Session ID (Bypasses Password Block)
-    if MANUAL_SESSION_ID:
-        print("🍪 Using Session ID from .env...")
-        try:
-            cl.login_by_sessionid(MANUAL_SESSION_ID)
-            cl.dump_settings(session_file)
-            print("✅ Logged in via Session ID!")
-            return cl
-        except Exception as e:
-            print(f"❌ Session ID failed: {e}")
-            print("💡 Get a fresh session ID from Instagram cookies in browser.")
-
-    # 3. Fallback to Password
-    print(f"🔐 Logging in with password...")
-    try:
-        cl.login(USERNAME, PASSWORD)
-        # VERIFY login actually worked
+        return self._login_fresh(cl)
+
+    def call(self, fn):
+        """
+        Run fn(client), re-authenticating once if Instagram answers with
+        LoginRequired (the session expired since it was last verified).
+        """
+        cl = self.login()
+        if cl is None:
+            raise LoginRequired("Not logged in")
         try:
-            user_info = cl.account_info()
-            print(f"✅ Password login successful! User: {user_info.username}")
-            cl.dump_settings(session_file)
-            return cl
-        except Exception as verify_error:
-            print(f"❌ Login succeeded but account access failed: {verify_error}")
-            return None
-    except TwoFactorRequired:
-        print("📱 2FA Required!")
-        code = input("Enter 2FA Code: ")
-        cl.two_factor_login(code)
-        cl.dump_settings(session_file)
-        print("✅ 2FA login successful!")
-        return cl
-    except Exception as e:
-        print(f"❌ Login Error: {e}")
-        print("💡 Try these fixes:")
-        print("   1. Get fresh session ID from Instagram cookies (Chrome DevTools)")
-        print("   2. Check if password is correct")
-        print("   3. Instagram might be blocking automation - wait 1 hour")
-        return None
+            return fn(cl)
+        except LoginRequired as e:
+            print(f"⚠️ Session rejected ({e}). Re-authenticating...")
+            self.client = None
+            self.verified_at = 0
+            cl = self._login_fresh(cl)
+            if cl is None:
+                raise
+            return fn(cl)
+
+
+session = SessionManager()
+
+
+def login_user():
+    """Logged-in Client shared by the whole run (see SessionManager), or None"""
+    return session.login()
 
 if __name__ == "__main__":
-    login_user()
\ No newline at end of file
+    login_user()
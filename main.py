@@ -1,8 +1,8 @@
 import os
-import time
 import random
-import json
+import time
 import shutil
+import argparse
 from dotenv import load_dotenv
 
 # --- 🛠️ FIX FOR PILLOW 10+ CRASH (MUST BE AT TOP) ---
@@ -11,16 +11,19 @@ if not hasattr(PIL.Image, 'ANTIALIAS'):
     PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
 # ----------------------------------------------------
 
-# Google AI
-from google import genai
-from google.genai import types
- 
+# Gemini scripts (generated in batches, queued locally)
+from content_backlog import ContentBacklog
+from content_provider import get_provider, PROVIDER_MODES, DEFAULT_PROVIDER, DEFAULT_CASSETTE
+from script_index import ScriptIndex
 
 # Instagram Login
-from login import login_user
+from login import session
+from reel_upload import prepare_upload, upload_clip, find_posted_clip
 
 # Advanced Video Editor
-from video_editor import create_viral_reel_advanced, generate_thumbnail 
+from video_editor import create_viral_reel_advanced, generate_thumbnail, read_render_info, IMAGES_DIR
+from image_library import ImageLibrary
+from render_profiles import available_profiles, DEFAULT_PROFILE
 
 # --- CONFIGURATION ---
 load_dotenv()
@@ -30,6 +33,9 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 OUTPUT_DIR = "output"
 IMAGES_DIR = "images"
 
+# Scripts leave the queue and are indexed once posted; near-duplicates are skipped before TTS
+content_backlog = ContentBacklog(index=ScriptIndex())
+
 def clean_output():
     """Wipes the output folder to prevent old files from mixing in."""
     if os.path.exists(OUTPUT_DIR):
@@ -43,77 +49,36 @@ def clean_output():
     print("🧹 Workspace cleaned.")
 
 # --- STEP 1: VIRAL CONTENT (GEMINI) ---
-# --- STEP 1: VIRAL CONTENT (GEMINI) ---
-def get_viral_content():
+def get_viral_content(provider=None):
+    """
+    Next script from the local content backlog.
+
+    Scripts are generated by Gemini in batches (one request per batch) and
+    queued in .cache/content_backlog.json. Posting only waits on Gemini when
+    the queue is empty; when it runs low it is refilled in the background.
+    The script stays queued until content_backlog.mark_posted() is called
+    after a successful upload.
+
+    Args:
+        provider: Content provider (content_provider.py) for a self-contained
+            run: one request, a throwaway backlog in the output folder and no
+            duplicate index. Such runs are never uploaded (the script was not
+            checked against, or added to, the posted-script index); seed
+            `random` with provider.seed so replays are identical. None = the
+            persistent backlog with live Gemini.
+    """
     print("🧠 Brainstorming viral hook...")
     
-    if not GOOGLE_API_KEY:
+    backlog = content_backlog
+    if provider is not None:
+        backlog = ContentBacklog(path=os.path.join(OUTPUT_DIR, "content_backlog.json"), min_size=0,
+                                 provider=provider)
+    elif not GOOGLE_API_KEY and not len(content_backlog):
         raise ValueError("❌ GOOGLE_API_KEY missing in .env file!")
 
-    client = genai.Client(api_key=GOOGLE_API_KEY)
-    
-    # Make prompt dynamic with random themes/topics for variety
-    themes = [
-    "discipline over emotion",
-    "faith as structure, not comfort",
-    "masculinity without arrogance",
-    "silence, patience, restraint",
-    "obedience before results",
-    "losing ego to gain direction",
-    "becoming dangerous to laziness, not people"
-    ]
-
-    selected_theme = random.choice(themes)
-    timestamp = int(time.time())  # Add timestamp for uniqueness
-    
-    prompt = (
-    f"Role: You are an anonymous disciplined spiritual guide for men who feel lost. "
-    f"Your voice is calm, grounded, and authoritative — never loud, never motivational. "
-    f"You speak like someone who has suffered, learned, and simplified life. "
-    f"Theme for this video: {selected_theme}. "
-    f"Session ID: {timestamp}. "
-
-    f"Task: Generate a UNIQUE Hindi (Devanagari) script for a 15-second video. "
-    f"STRICT LENGTH RULES (MANDATORY): "
-    f"- TOTAL WORD COUNT: 32 to 36 words ONLY. "
-    f"- Short sentences. Max 7–8 words per sentence. "
-
-    f"Structure: "
-    f"1. HOOK (0–3 sec): A blunt truth that stops lost men from scrolling. No hype. "
-    f"2. BODY (3–13 sec): One clear principle linking discipline, faith, and masculinity. "
-    f"   Speak as guidance, not preaching. Short sentences. No clichés. "
-    f"3. CLOSE (last 2 sec): A direct command that builds habit and continuity: "
-    f"   'Roz aisi yaad ke liye follow karo.' "
-
-    f"Rules: "
-    f"- Do NOT exceed 36 words total. "
-    f"- Do NOT include emojis. "
-    f"- Do NOT mention motivation, hustle, trends, or social media. "
-    f"- Do NOT repeat phrases from earlier scripts. "
-    f"- Make it sound lived-in, not generated. "
-
-    f"Output format: STRICT JSON ONLY with keys: "
-    f"'hindi_quote', 'english_translation', 'caption', 'hashtags'. "
-)
-
     try:
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",  # Better rate limits than exp
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                temperature=0.9  # High creativity while staying within limits
-            )
-        )
-        
-        content = json.loads(response.text)
-        
-        # Validate response has required fields
-        required_fields = ['hindi_quote', 'english_translation', 'caption', 'hashtags']
-        if not all(field in content for field in required_fields):
-            raise ValueError(f"❌ Gemini response missing required fields! Got: {list(content.keys())}")
-        
-        print(f"✅ Generated unique content (Theme: {selected_theme})")
+        content = backlog.next_script()
+        print(f"✅ Generated unique content (Theme: {content.get('theme')}, {len(backlog)} left in backlog)")
         return content
         
     except Exception as e:
@@ -124,7 +89,7 @@ def get_viral_content():
         raise RuntimeError(f"Failed to generate content from Gemini: {e}")
 
 # --- STEP 3: ADVANCED VIDEO EDITING ---
-def create_viral_reel(audio_path, hindi_text):
+def create_viral_reel(audio_path, hindi_text, profile=None):
     """
     Create viral reel using advanced video editor with:
     - Progressive color grading (B&W → Full Color)
@@ -132,6 +97,7 @@ def create_viral_reel(audio_path, hindi_text):
     - edgeTTS deep voice (if available)
     - Fast-paced editing (0.5s per clip)
     - Automatic cleanup
+    - Render profile: draft / preview / final (default: RENDER_PROFILE or final)
     """
     print("🎬 Creating Viral Reel with Advanced Effects...")
     
@@ -139,7 +105,8 @@ def create_viral_reel(audio_path, hindi_text):
     output_path = create_viral_reel_advanced(
         hindi_text=hindi_text,
         output_name="viral_reel.mp4",
-        use_voice=True  # Generate edgeTTS voice
+        use_voice=True,  # Generate edgeTTS voice
+        profile=profile
     )
     
     return output_path
@@ -147,39 +114,33 @@ def create_viral_reel(audio_path, hindi_text):
 # --- STEP 4: UPLOAD TO INSTAGRAM ---
 def upload_reel(video_path, caption):
     print("🚀 Connecting to Instagram...")
-    cl = login_user() 
+    # Log in while the thumbnail is being made
+    cl, thumbnail_path = prepare_upload(video_path, generate_thumbnail)
     if not cl:
         print("❌ Login failed. Video saved but not uploaded.")
-        return
-
-    # VERIFY we're actually logged in
-    try:
-        user = cl.account_info()
-        print(f"✅ Logged in as: @{user.username}")
-    except Exception as e:
-        print(f"❌ Not actually logged in! Error: {e}")
         print("💡 Get fresh INSTA_SESSIONID from browser cookies (see FIX_INSTAGRAM_LOGIN.md)")
         return
 
-    # Generate thumbnail
-    thumbnail_path = generate_thumbnail(video_path)
+    # The session was verified by login_user (or within INSTA_SESSION_TTL)
+    username = session.username
+    print(f"✅ Logged in as: @{username}")
+
+    # Duration and size from the render, so instagrapi doesn't re-probe the MP4
+    video_info = read_render_info(video_path)
     
     print(f"📤 Uploading reel to Instagram...")
     print(f"   Caption: {caption[:60]}...")
     
     try:
-        media = cl.clip_upload(
-            video_path,
-            caption=caption,
-            thumbnail=thumbnail_path
-        )
+        # Retries transient failures with backoff, re-authenticates on LoginRequired
+        media = upload_clip(video_path, caption, thumbnail=thumbnail_path, video_info=video_info)
         
         # Success
         if media and hasattr(media, 'code'):
             print(f"\n🎉 SUCCESS! REEL POSTED!")
             print(f"📱 Code: {media.code}")
             print(f"🔗 URL: https://www.instagram.com/reel/{media.code}/")
-            print(f"👀 Profile: https://www.instagram.com/{user.username}/")
+            print(f"👀 Profile: https://www.instagram.com/{username}/")
             return media
         else:
             print("⚠️ Upload returned but no media code")
@@ -191,8 +152,11 @@ def upload_reel(video_path, caption):
         # Sometimes instagrapi throws pydantic errors even when upload succeeds
         if "pydantic" in error_str.lower() or "validation" in error_str.lower():
             print("\n✅ Upload likely SUCCEEDED (pydantic parsing error)")
-            print(f"👀 Check your profile: https://www.instagram.com/{user.username}/")
-            return None
+            print(f"👀 Check your profile: https://www.instagram.com/{username}/")
+            try:
+                return find_posted_clip(caption)
+            except Exception:
+                return None
         
         # Real errors
         print(f"\n❌ UPLOAD FAILED: {error_str}")
@@ -208,20 +172,51 @@ def upload_reel(video_path, caption):
 
 # --- MAIN LOOP ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and post a viral reel")
+    parser.add_argument("--profile", choices=available_profiles(), default=DEFAULT_PROFILE,
+                        help="Render profile (draft/preview render faster, final is uploaded quality)")
+    parser.add_argument("--content", choices=PROVIDER_MODES, default=DEFAULT_PROVIDER,
+                        help="Script source: live Gemini, live + record to a cassette, or replay a cassette offline")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE,
+                        help="Cassette file for --content record/replay")
+    parser.add_argument("--replay-latency", action="store_true",
+                        help="When replaying, wait as long as the recorded API call took")
+    args = parser.parse_args()
+    
     try:
+        started = time.time()
         clean_output()
         
         # 1. Content Generation
-        data = get_viral_content()
+        provider = None
+        if args.content != "live":
+            provider = get_provider(args.content, args.cassette, args.replay_latency)
+            # Same themes, images, look and motions as the recorded run (these
+            # runs are never uploaded, so they never mark images as used)
+            random.seed(provider.seed)
+        data = get_viral_content(provider)
         print(f"📜 Hook: {data['hindi_quote'][:40]}...")
         
         # 2. Video Creation (with integrated voice generation)
         # The advanced video editor handles both voice and video creation
-        video_file = create_viral_reel(None, data['hindi_quote'])
+        video_file = create_viral_reel(None, data['hindi_quote'], profile=args.profile)
         
-        # 3. Upload
+        # 3. Upload (draft/preview renders are only for checking locally)
         caption = f"{data['caption']}\n\n{data['hashtags']}"
-        upload_reel(video_file, caption)
+        if provider is not None:
+            print(f"⏭️ Skipping upload for --content {args.content} run (script not in the posted index): {video_file}")
+        elif args.profile == "final":
+            if upload_reel(video_file, caption):
+                # Only now is the script used up (and blocked as a repeat)
+                content_backlog.mark_posted(data)
+                # ...and its images start their reuse cooldown
+                render_info = read_render_info(video_file)
+                if render_info:
+                    ImageLibrary(IMAGES_DIR).mark_used(render_info.get("images", []))
+        else:
+            print(f"⏭️ Skipping upload for '{args.profile}' render: {video_file}")
+        
+        print(f"\n⏱️ Total time: {time.time() - started:.1f}s")
         
     except Exception as e:
         print(f"\n❌ FATAL ERROR: {e}")
@@ -0,0 +1,144 @@
+"""
+🧩 Parallel Segment Renderer
+=============================
+Renders a reel's timeline as independent segments and joins them without
+re-encoding:
+- Every image clip and every transition is its own segment
+- Segments are encoded in a process pool, all with identical encoder
+  settings, so their streams can be concatenated as-is
+- The CPUs are split between the workers' x264 encoders instead of every
+  encoder starting one thread per core
+- The concat demuxer joins them (stream copy) and the audio for the
+  whole timeline is muxed in the same pass
+- An optional thumbnail tap runs inside the workers on the segments it
+  wants frames from
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from contextlib import nullcontext
+
+from ken_burns import make_ken_burns_clip, OUTPUT_SIZE
+from transition_cache import make_transition_clip
+from ffmpeg_export import write_video_ffmpeg, concat_segments_ffmpeg, AUDIO_FPS
+from stage_scheduler import process_pool
+
+# --- Configuration ---
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0")) or None  # None = one per CPU
+
+
+def image_segment(frame, duration, zoom_ratio=1.2, pan="center"):
+    """Segment spec for a Ken Burns image clip"""
+    return {"kind": "image", "frame": frame, "duration": duration,
+            "zoom_ratio": zoom_ratio, "pan": pan}
+
+
+def transition_segment(path, duration):
+    """Segment spec for a transition clip"""
+    return {"kind": "transition", "path": path, "duration": duration}
+
+
+def build_segment_clip(spec, size=OUTPUT_SIZE, fps=30, transition_pool=None):
+    """
+    Turn a segment spec into its clip.
+
+    Args:
+        spec: Dict from image_segment() or transition_segment()
+        size: Output frame size (width, height)
+        fps: Output frame rate
+        transition_pool: Optional TransitionPool to share transition frames
+
+    Returns:
+        VideoClip of exactly `size`
+    """
+    if spec["kind"] == "image":
+        return make_ken_burns_clip(spec["frame"], spec["duration"], spec["zoom_ratio"],
+                                   spec["pan"], size=size, fps=fps)
+    if spec["kind"] == "transition":
+        if transition_pool is not None:
+            return transition_pool.clip(spec["path"], spec["duration"])
+        return make_transition_clip(spec["path"], spec["duration"], size, fps)
+    raise ValueError(f"Unknown segment kind: {spec['kind']}")
+
+
+def _render_segment(spec, output_path, size, fps, encoder, tap=None):
+    """Worker: encode one segment (video only); returns the tap with its capture"""
+    clip = build_segment_clip(spec, size, fps)
+    try:
+        write_video_ffmpeg(clip, output_path, fps=fps, with_audio=False, tap=tap, **encoder)
+    finally:
+        clip.close()
+    return tap
+
+
+def render_segments_parallel(segments, output_path, audio=None, size=OUTPUT_SIZE, fps=30,
+                             codec='libx264', preset='medium', crf=None, threads=None,
+                             audio_codec='aac', audio_bitrate=None, audio_fps=AUDIO_FPS,
+                             workers=None, work_dir=None, tap=None, pool=None):
+    """
+    Encode every segment in parallel, then join them and mux the audio.
+
+    Args:
+        segments: Segment specs in timeline order
+        output_path: Output file path
+        audio: Audio clip for the whole timeline (or None)
+        size: Output frame size (width, height)
+        fps: Output frame rate
+        codec: Video codec (default: libx264)
+        preset: x264 preset
+        crf: x264 constant rate factor (None = encoder default)
+        threads: Encoder threads per segment (None = CPUs divided among the
+            workers, at least 1; x264's own default would start one thread
+            per core in every worker)
+        audio_codec: Audio codec (default: aac)
+        audio_bitrate: Audio bitrate (None = encoder default)
+        audio_fps: Audio sample rate
+        workers: Worker processes (default: RENDER_WORKERS or one per CPU)
+        work_dir: Folder for the temporary segment files
+        tap: Optional thumbnail_tap.FrameTap; captures are merged into it
+        pool: Running process pool to encode in (e.g. StageGraph.processes,
+            with `workers` set to its size) instead of starting one
+
+    Returns:
+        Path to the written file
+    """
+    if not segments:
+        raise ValueError("❌ Nothing to render: the timeline has no segments")
+
+    workers = workers or RENDER_WORKERS or os.cpu_count() or 1
+    workers = min(workers, len(segments))
+    if threads is None:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+    encoder = {"codec": codec, "preset": preset, "crf": crf, "threads": threads}
+    duration = sum(spec["duration"] for spec in segments)
+
+    if work_dir:
+        os.makedirs(work_dir, exist_ok=True)
+    segment_dir = tempfile.mkdtemp(prefix="segments_", dir=work_dir)
+    try:
+        start = time.time()
+        paths = [os.path.join(segment_dir, f"segment_{i:03d}.mp4") for i in range(len(segments))]
+        starts = [0.0]
+        for spec in segments[:-1]:
+            starts.append(starts[-1] + spec["duration"])
+        with nullcontext(pool) if pool is not None else process_pool(workers) as pool:
+            futures = []
+            for spec, path, seg_start in zip(segments, paths, starts):
+                seg_tap = tap.segment(seg_start, seg_start + spec["duration"]) if tap is not None else None
+                futures.append(pool.submit(_render_segment, spec, path, tuple(size), fps, encoder, seg_tap))
+            for future in futures:
+                seg_tap = future.result()
+                if seg_tap is not None:
+                    tap.merge(seg_tap)
+        print(f"   Rendered {len(paths)} segments with {workers} worker(s) x {threads} encoder thread(s) "
+              f"in {time.time() - start:.1f}s")
+
+        concat_segments_ffmpeg(paths, output_path, audio=audio, duration=duration,
+                               audio_codec=audio_codec, audio_bitrate=audio_bitrate,
+                               audio_fps=audio_fps)
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+    return output_path
@@ -0,0 +1,191 @@
+"""
+📤 Reel Upload
+===============
+Posts a rendered reel with as little waiting and as few lost posts as possible:
+- Logging in and producing the thumbnail run at the same time
+- The duration and size known from the render are handed to instagrapi,
+  so it does not open and analyze the MP4 again
+- Transient failures (network, timeouts, throttling, 5xx) are retried with
+  exponential backoff; login, thumbnail and metadata are kept between
+  attempts, only the upload itself is repeated (the whole video: no
+  resume, see upload_clip)
+- A failure once Instagram was asked to publish (clip_configure) is
+  ambiguous: the account's recent posts are checked for the caption first,
+  so a reel that did go through is never posted twice
+- An expired session is re-authenticated once (login.session.call)
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+from instagrapi.exceptions import (
+    ClientConnectionError,
+    ClientError,
+    ClientIncompleteReadError,
+    ClientRequestTimeout,
+    ClientThrottledError,
+)
+import instagrapi.mixins.clip as instagrapi_clip
+
+from login import login_user, session
+
+# --- Configuration ---
+UPLOAD_RETRIES = int(os.getenv("UPLOAD_RETRIES", "3"))   # Extra attempts after the first
+UPLOAD_BACKOFF = float(os.getenv("UPLOAD_BACKOFF", "5")) # Seconds before the first retry, doubled each time
+THROTTLE_BACKOFF = 60.0                                  # Minimum wait after a 429
+POSTED_CHECK_COUNT = 6  # Recent posts searched for the caption after an ambiguous failure
+
+TRANSIENT_ERRORS = (
+    ClientConnectionError,
+    ClientRequestTimeout,
+    ClientIncompleteReadError,
+    ClientThrottledError,
+    requests.ConnectionError,
+    requests.Timeout,
+)
+
+
+def is_transient(error):
+    """
+    True for failures worth retrying. Whether the post went through is
+    not known from the error; see upload_clip for failures while publishing.
+    """
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, ClientError):
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        return status is not None and (status >= 500 or status == 429)
+    return False
+
+
+@contextmanager
+def known_video_metadata(video_path, thumbnail, width, height, duration):
+    """
+    Make instagrapi use the given metadata for `video_path` instead of
+    opening the file to analyze it. Other videos are analyzed as usual.
+    """
+    original = instagrapi_clip.analyze_video
+    target = Path(video_path).resolve()
+
+    def analyze_video(path, thumbnail_path=None):
+        if Path(path).resolve() == target:
+            return Path(thumbnail), width, height, duration
+        return original(path, thumbnail_path)
+
+    instagrapi_clip.analyze_video = analyze_video
+    try:
+        yield
+    finally:
+        instagrapi_clip.analyze_video = original
+
+
+@contextmanager
+def watch_configure(cl, phase):
+    """Set phase["configure"] once clip_upload asks Instagram to publish the reel"""
+    original = cl.clip_configure
+
+    def clip_configure(*args, **kwargs):
+        phase["configure"] = True
+        return original(*args, **kwargs)
+
+    cl.clip_configure = clip_configure  # Instance attribute shadows the mixin method
+    try:
+        yield
+    finally:
+        del cl.clip_configure
+
+
+def find_posted_clip(caption, amount=POSTED_CHECK_COUNT):
+    """The account's most recent media with exactly this caption, or None"""
+    medias = session.call(lambda cl: cl.user_medias(cl.user_id, amount=amount))
+    for media in medias:
+        if (media.caption_text or "").strip() == caption.strip():
+            return media
+    return None
+
+
+def prepare_upload(video_path, make_thumbnail):
+    """
+    Log in and make the thumbnail concurrently.
+
+    Args:
+        video_path: Rendered reel
+        make_thumbnail: Callable(video_path) -> thumbnail path or None
+
+    Returns:
+        (client or None, thumbnail path or None)
+    """
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="upload-prep") as pool:
+        client = pool.submit(login_user)
+        thumbnail = pool.submit(make_thumbnail, video_path)
+        return client.result(), thumbnail.result()
+
+
+def upload_clip(video_path, caption, thumbnail=None, video_info=None, retries=UPLOAD_RETRIES,
+                backoff=UPLOAD_BACKOFF):
+    """
+    Upload a reel, retrying transient failures.
+
+    Every retry sends the whole video again; resuming from a stored upload
+    id and offset is not done. instagrapi's clip_upload() makes a new
+    upload id for each call and posts the file in one request at offset 0,
+    with no way to pass an id or offset in. Resuming would mean
+    re-implementing its private rupload handshake, which breaks whenever
+    instagrapi or Instagram changes it. A reel is a few MB, so re-sending it
+    costs seconds.
+
+    Args:
+        video_path: Rendered reel
+        caption: Caption with hashtags
+        thumbnail: Thumbnail JPEG (None = instagrapi makes one)
+        video_info: Dict with "width", "height" and "duration" from the render
+            (None = instagrapi analyzes the file)
+        retries: Extra attempts after the first
+        backoff: Seconds before the first retry, doubled every attempt
+
+    Returns:
+        The posted Media
+
+    Raises:
+        The last error when it is not transient or retries run out, or when
+        it happened while publishing and the account could not be checked
+    """
+    phase = {"configure": False}
+
+    def upload(cl):
+        with watch_configure(cl, phase):
+            return cl.clip_upload(video_path, caption=caption, thumbnail=thumbnail)
+
+    for attempt in range(retries + 1):
+        phase["configure"] = False
+        try:
+            if thumbnail and video_info:
+                with known_video_metadata(video_path, thumbnail, video_info["width"],
+                                          video_info["height"], video_info["duration"]):
+                    return session.call(upload)
+            # Re-authenticates once if the session expired since it was verified
+            return session.call(upload)
+        except Exception as e:
+            if attempt == retries or not is_transient(e):
+                raise
+            if phase["configure"]:
+                # The upload finished; Instagram may have published it anyway
+                try:
+                    posted = find_posted_clip(caption)
+                except Exception as check_error:
+                    print(f"   ⚠️ Publishing failed ({type(e).__name__}) and the profile could not be "
+                          f"checked ({check_error}). Not retrying, to avoid a double post.")
+                    raise e
+                if posted is not None:
+                    print(f"   ✅ Publishing reported {type(e).__name__}, but the reel is live: {posted.code}")
+                    return posted
+            wait = backoff * 2 ** attempt
+            if isinstance(e, ClientThrottledError):
+                wait = max(wait, THROTTLE_BACKOFF)
+            print(f"   ⚠️ Upload attempt {attempt + 1} failed ({type(e).__name__}: {e}). "
+                  f"Retrying in {wait:.0f}s...")
+            time.sleep(wait)
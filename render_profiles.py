@@ -0,0 +1,43 @@
+"""
+🎚️ Render Profiles
+===================
+Named export settings that change together:
+- draft: 540x960, ultrafast - check timing and audio in a fraction of the time
+- preview: 720x1280, veryfast - good enough to judge the look
+- final: 1080x1920, medium - what gets uploaded
+
+Every profile renders the same timeline (same images, durations,
+transitions and audio); only resolution, frame rate and encoder
+settings differ.
+"""
+
+import os
+
+# --- Configuration ---
+RENDER_PROFILES = {
+    "draft": {"size": (540, 960), "fps": 15, "preset": "ultrafast", "crf": 30, "threads": None},
+    "preview": {"size": (720, 1280), "fps": 30, "preset": "veryfast", "crf": 26, "threads": None},
+    "final": {"size": (1080, 1920), "fps": 30, "preset": "medium", "crf": None, "threads": 4},
+}
+DEFAULT_PROFILE = os.getenv("RENDER_PROFILE", "final")
+
+
+def available_profiles():
+    """Return the names of all render profiles"""
+    return list(RENDER_PROFILES)
+
+
+def get_profile(name=None):
+    """
+    Look up a render profile.
+
+    Args:
+        name: Profile name (default: RENDER_PROFILE environment variable or "final")
+
+    Returns:
+        Dict with size, fps, preset, crf and threads
+    """
+    name = name or DEFAULT_PROFILE
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"❌ Unknown render profile '{name}'. Use one of: {', '.join(RENDER_PROFILES)}")
+    return dict(RENDER_PROFILES[name])
@@ -0,0 +1,212 @@
+"""
+🔁 Near-Duplicate Script Index
+===============================
+Remembers every posted script and spots repeats before any TTS or render
+time is spent on them:
+- Scripts are compared as sets of character n-grams (shingles) of the
+  normalized Devanagari text, so reordered or lightly edited lines match
+- Each script is reduced to a fixed-size MinHash signature (vectorized numpy)
+- LSH banding finds the few candidates worth comparing, so a lookup stays
+  sub-millisecond with tens of thousands of scripts
+- The archive is an append-only JSONL file under .cache/
+"""
+
+import json
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from disk_cache import CACHE_DIR
+
+# --- Configuration ---
+INDEX_FILE = os.path.join(CACHE_DIR, "script_index.jsonl")
+SHINGLE_SIZE = 4        # Characters per shingle
+NUM_PERM = 120          # MinHash signature length
+LSH_BANDS = 40          # NUM_PERM / LSH_BANDS rows per band
+DUPLICATE_THRESHOLD = float(os.getenv("DUPLICATE_THRESHOLD", "0.5"))  # Estimated Jaccard similarity
+INDEX_VERSION = 1       # Bump when the settings above (except the threshold) change
+
+_ROWS = NUM_PERM // LSH_BANDS
+_rng = np.random.default_rng(20240101)  # Fixed seed: signatures are persisted
+_HASH_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)  # Odd multipliers
+_HASH_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+_SHINGLE_MIX = _rng.integers(1, 2**63, SHINGLE_SIZE, dtype=np.uint64) | np.uint64(1)
+_PUNCTUATION = re.compile(r"[।॥!\"#$%&'()*+,\-./:;<=>?@\[\\\]^_`{|}~“”‘’…–—]")
+
+
+def normalize_script(text):
+    """NFC, lowercase, no punctuation (incl. danda), single spaces"""
+    text = _PUNCTUATION.sub(" ", unicodedata.normalize("NFC", text).lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def shingle_hashes(text):
+    """
+    Stable 64-bit hashes of the character n-grams of the normalized text.
+
+    The code points are viewed as a numpy array and every window of
+    SHINGLE_SIZE is hashed at once, so no Python-level loop is involved.
+    """
+    codes = np.frombuffer(normalize_script(text).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if 0 < len(codes) < SHINGLE_SIZE:
+        codes = np.pad(codes, (0, SHINGLE_SIZE - len(codes)))
+    if not len(codes):
+        return codes
+    return np.unique(sliding_window_view(codes, SHINGLE_SIZE) @ _SHINGLE_MIX)
+
+
+def minhash(text):
+    """
+    MinHash signature of a script.
+
+    NUM_PERM multiply-shift hash functions are applied to every shingle
+    hash at once and the minimum of each is kept.
+
+    Returns:
+        uint32 array of length NUM_PERM
+    """
+    hashes = shingle_hashes(text)
+    if not len(hashes):
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    mixed = (hashes[:, None] * _HASH_A + _HASH_B) >> np.uint64(32)
+    return mixed.min(axis=0).astype(np.uint32)
+
+
+def _band_keys(signature):
+    rows = signature.reshape(LSH_BANDS, _ROWS)
+    return [(band, rows[band].tobytes()) for band in range(LSH_BANDS)]
+
+
+class ScriptIndex:
+    """
+    MinHash + LSH index over every script in INDEX_FILE.
+
+    Thread-safe; the file is loaded lazily on first use. With path=None the
+    index lives in memory only (e.g. the scripts of one generated batch).
+    """
+
+    def __init__(self, path=INDEX_FILE, threshold=DUPLICATE_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._texts = None
+        self._signatures = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self._count = 0
+        self._buckets = {}
+
+    def _ensure_loaded(self):
+        if self._texts is not None:
+            return
+        self._texts = []
+        signatures = []
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line
+                    if entry.get("v") == INDEX_VERSION:
+                        signature = np.frombuffer(bytes.fromhex(entry["minhash"]), dtype=np.uint32)
+                    else:
+                        signature = minhash(entry["text"])
+                    self._texts.append(entry["text"])
+                    signatures.append(signature)
+        except OSError:
+            pass
+        if signatures:
+            self._signatures = np.array(signatures, dtype=np.uint32)
+        self._count = len(signatures)
+        for i, signature in enumerate(signatures):
+            self._insert(i, signature)
+
+    def _insert(self, i, signature):
+        for key in _band_keys(signature):
+            self._buckets.setdefault(key, []).append(i)
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return self._count
+
+    def best_match(self, text, signature=None):
+        """
+        Most similar indexed script.
+
+        Args:
+            text: Script to score
+            signature: Its minhash(), if already computed
+
+        Returns:
+            (similarity, indexed_text) - similarity is the estimated Jaccard
+            similarity of the shingle sets; (0.0, None) if nothing is close
+        """
+        if signature is None:
+            signature = minhash(text)
+        with self._lock:
+            self._ensure_loaded()
+            candidates = set()
+            for key in _band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            if not candidates:
+                return 0.0, None
+            ids = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+            scores = (self._signatures[ids] == signature).mean(axis=1)
+            best = int(scores.argmax())
+            return float(scores[best]), self._texts[ids[best]]
+
+    def is_duplicate(self, text):
+        """True if an indexed script is at least `threshold` similar"""
+        return self.best_match(text)[0] >= self.threshold
+
+    def add(self, text):
+        """Index a script and append it to the archive file"""
+        signature = minhash(text)
+        with self._lock:
+            self._ensure_loaded()
+            if self._count == len(self._signatures):
+                grown = np.empty((max(64, 2 * self._count), NUM_PERM), dtype=np.uint32)
+                grown[:self._count] = self._signatures[:self._count]
+                self._signatures = grown
+            self._signatures[self._count] = signature
+            self._texts.append(text)
+            self._insert(self._count, signature)
+            self._count += 1
+            if self.path is None:
+                return signature
+
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"text": text, "minhash": signature.tobytes().hex(), "v": INDEX_VERSION},
+                                   ensure_ascii=False) + "\n")
+        return signature
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Score a script against the archive of posted scripts")
+    parser.add_argument("text", nargs="?", help="Script to score")
+    parser.add_argument("--add", action="store_true", help="Also add it to the archive")
+    args = parser.parse_args()
+
+    index = ScriptIndex()
+    print(f"🔁 {len(index)} scripts indexed in {INDEX_FILE}")
+    if args.text:
+        start = time.perf_counter()
+        score, match = index.best_match(args.text)
+        elapsed = (time.perf_counter() - start) * 1000
+        verdict = "❌ duplicate" if score >= index.threshold else "✅ unique"
+        print(f"   {verdict}: similarity {score:.2f} (threshold {index.threshold}) in {elapsed:.2f}ms")
+        if match:
+            print(f"   Closest: {match[:60]}...")
+        if args.add:
+            index.add(args.text)
+            print("   Added to the archive")
@@ -0,0 +1,168 @@
+"""
+🗺️ Stage Scheduler
+===================
+Runs a build expressed as a dependency graph of named stages:
+- A stage starts as soon as every stage it depends on has finished
+- "async" stages are coroutines on the asyncio loop (network I/O like TTS)
+- "thread" stages run in a thread pool (file and ffmpeg work)
+- "process" stages run in a process pool (CPU-bound work like grading)
+- Every stage is timed and the critical path is reported at the end
+- While running, the graph's worker processes are available to thread
+  stages as `graph.processes` (started before any thread, so no forkserver)
+- Graphs running side by side (batch jobs) can share one process pool
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# --- Configuration ---
+STAGE_KINDS = ("async", "inline", "thread", "process")
+
+
+def process_pool(max_workers=None):
+    """
+    ProcessPoolExecutor that is safe to create from a multithreaded program.
+
+    Forking copies only the calling thread, so a lock held by another thread
+    at that moment stays locked forever in the child. When other threads
+    are running, workers are started through a forkserver instead.
+    """
+    context = None
+    if threading.active_count() > 1 and "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+
+class StageGraph:
+    """
+    Dependency graph of pipeline stages.
+
+    Stages must be added after the stages they depend on, so the graph is
+    always acyclic. A stage function is called with its fixed `args`
+    followed by the results of its dependencies, in the order listed.
+    """
+
+    def __init__(self, thread_workers=None, process_workers=None, processes=None):
+        """
+        Args:
+            thread_workers: Thread pool size (default: CPUs + 4, at most 8)
+            process_workers: Process pool size (default: one per CPU)
+            processes: Running ProcessPoolExecutor to use instead of starting
+                one (it is not shut down by the graph)
+        """
+        self.thread_workers = thread_workers or min(8, (os.cpu_count() or 1) + 4)
+        self.process_workers = process_workers or os.cpu_count() or 1
+        self._shared_processes = processes
+        self._stages = {}
+        self.results = {}
+        self.processes = None  # The process pool, while run() is running
+        self.timings = {}  # name -> (start, end), seconds since run() started
+        self.wall_time = 0.0
+
+    def add(self, name, fn, args=(), deps=(), kind="thread"):
+        """
+        Add a stage.
+
+        Args:
+            name: Unique stage name
+            fn: Callable (a coroutine function for kind="async")
+            args: Positional arguments passed before the dependency results
+            deps: Names of stages that must finish first
+            kind: One of STAGE_KINDS
+
+        Returns:
+            The stage name
+        """
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"Unknown stage kind '{kind}'. Use one of: {', '.join(STAGE_KINDS)}")
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self._stages[name] = (fn, tuple(args), tuple(deps), kind)
+        return name
+
+    def run(self):
+        """Run every stage and return {name: result}"""
+        return asyncio.run(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        uses_processes = any(kind == "process" for _, _, _, kind in self._stages.values())
+
+        processes = self._shared_processes
+        owns_processes = uses_processes and processes is None
+        if owns_processes:
+            processes = process_pool(self.process_workers)
+            # Start the workers now, before any stage thread exists
+            processes.submit(os.getpid).result()
+        self.processes = processes
+        threads = ThreadPoolExecutor(max_workers=self.thread_workers)
+        tasks = {}
+
+        async def run_stage(name):
+            fn, args, deps, kind = self._stages[name]
+            inputs = [await tasks[dep] for dep in deps]
+            start = time.perf_counter() - started
+            if kind == "async":
+                result = await fn(*args, *inputs)
+            elif kind == "inline":
+                result = fn(*args, *inputs)
+            elif kind == "thread":
+                result = await loop.run_in_executor(threads, fn, *args, *inputs)
+            else:
+                result = await loop.run_in_executor(processes, fn, *args, *inputs)
+            self.timings[name] = (start, time.perf_counter() - started)
+            self.results[name] = result
+            return result
+
+        try:
+            # Insertion order is a topological order, so every dependency's task exists
+            for name in self._stages:
+                tasks[name] = asyncio.ensure_future(run_stage(name))
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            threads.shutdown(wait=True)
+            if owns_processes:
+                processes.shutdown(wait=True)
+            self.processes = None
+            self.wall_time = time.perf_counter() - started
+
+        return self.results
+
+    def critical_path(self):
+        """
+        Chain of stages that determined the total time: start from the stage
+        that finished last and repeatedly step to the dependency that
+        finished last.
+        """
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n][1])
+        path = [name]
+        while True:
+            deps = [d for d in self._stages[name][2] if d in self.timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda d: self.timings[d][1])
+            path.append(name)
+        return path[::-1]
+
+    def report(self):
+        """Print per-stage timings and the critical path"""
+        busy = sum(end - start for start, end in self.timings.values())
+        print(f"   ⏱️ {len(self.timings)} stages: {busy:.1f}s of work in {self.wall_time:.1f}s")
+        for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1]):
+            print(f"      {name:<16} {start:6.2f}s → {end:6.2f}s ({end - start:.2f}s)")
+        path = self.critical_path()
+        if path:
+            span = self.timings[path[-1]][1] - self.timings[path[0]][0]
+            print(f"   🧭 Critical path: {' → '.join(path)} ({span:.1f}s)")
@@ -0,0 +1,220 @@
+"""
+🧪 Component Tests
+===================
+pytest checks for the building blocks behind the reel pipeline:
+- Built-in looks stay within GRADE_TOLERANCE of the original ImageEnhance chain
+- ScriptIndex finds near-duplicate scripts and passes unrelated ones
+- ImageLibrary.select honours the reuse cooldown, claim and batch hand-outs
+- StageGraph starts every stage after its dependencies, with their results
+
+Run: python -m pytest -q
+"""
+
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pytest
+from PIL import Image, ImageEnhance
+
+from color_grading import LOOKS, GRADE_TOLERANCE, grade_image
+from image_library import ImageLibrary
+from script_index import ScriptIndex
+from stage_scheduler import StageGraph
+
+
+# --- Colour grading ---
+def _baseline_look(img, filter_type):
+    """The ImageEnhance chain the built-in looks replaced"""
+    if filter_type == "cinematic":
+        img = ImageEnhance.Contrast(img).enhance(1.2)
+        img = ImageEnhance.Color(img).enhance(0.9)
+        return ImageEnhance.Brightness(img).enhance(1.05)
+    img = ImageEnhance.Color(img).enhance(1.3 if filter_type == "warm" else 1.2)
+    gains = (1.1, 1.0, 0.9) if filter_type == "warm" else (0.9, 1.0, 1.1)
+    pixels = np.array(img, dtype=np.float32)
+    for channel, gain in enumerate(gains):
+        pixels[:, :, channel] = np.clip(pixels[:, :, channel] * gain, 0, 255)
+    return Image.fromarray(pixels.astype(np.uint8))
+
+
+def _test_image(seed=0, size=(256, 192)):
+    """Gradients plus noise: smooth areas, hard clipping and saturated colours"""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    x = np.linspace(0, 255, w)[None, :, None]
+    y = np.linspace(0, 255, h)[:, None, None]
+    base = np.concatenate([np.broadcast_to(x, (h, w, 1)), np.broadcast_to(y, (h, w, 1)),
+                           np.broadcast_to((x + y) / 2, (h, w, 1))], axis=2)
+    noisy = base + rng.normal(0, 40, (h, w, 3))
+    return Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8))
+
+
+@pytest.mark.parametrize("filter_type", sorted(LOOKS))
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_look_matches_baseline_chain(filter_type, seed):
+    img = _test_image(seed)
+    graded = np.asarray(grade_image(img, filter_type), dtype=np.int16)
+    expected = np.asarray(_baseline_look(img, filter_type), dtype=np.int16)
+    diff = np.abs(graded - expected)
+    assert diff.max() <= GRADE_TOLERANCE
+    assert diff.mean() < 1.5
+
+
+def test_unknown_look_returns_input():
+    img = _test_image()
+    assert grade_image(img, "no-such-look") is img
+
+
+# --- Script index ---
+POSTED = "जो अनुशासन चुनता है वही अंत में जीतता है, भावनाएँ रास्ता भटका देती हैं"
+
+
+@pytest.fixture
+def script_index(tmp_path):
+    index = ScriptIndex(path=str(tmp_path / "script_index.jsonl"))
+    index.add(POSTED)
+    return index
+
+
+def test_near_duplicate_script_is_found(script_index):
+    # Same words, different punctuation and one word changed
+    edited = "जो अनुशासन चुनता है, वही अंत में जीतता है! भावनाएँ रास्ता भुला देती हैं।"
+    score, match = script_index.best_match(edited)
+    assert score >= script_index.threshold
+    assert match == POSTED
+    assert script_index.is_duplicate(edited)
+
+
+def test_unrelated_script_is_not_a_duplicate(script_index):
+    other = "मौन में ही शक्ति छिपी है, धैर्य रखो और बिना शोर के आगे बढ़ो"
+    assert script_index.best_match(other)[0] < script_index.threshold
+    assert not script_index.is_duplicate(other)
+
+
+def test_script_index_reloads_from_file(script_index):
+    reloaded = ScriptIndex(path=script_index.path)
+    assert len(reloaded) == 1
+    assert reloaded.is_duplicate(POSTED)
+
+
+def test_in_memory_script_index_writes_nothing(tmp_path):
+    index = ScriptIndex(path=None)
+    index.add(POSTED)
+    assert index.is_duplicate(POSTED)
+    assert list(tmp_path.iterdir()) == []
+
+
+# --- Image library ---
+@pytest.fixture
+def library(tmp_path):
+    """Library over 8 distinct noise images (different dHashes), synced"""
+    images = tmp_path / "images"
+    images.mkdir()
+    rng = np.random.default_rng(7)
+    for i in range(8):
+        pixels = rng.integers(0, 256, (500, 500, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(images / f"img{i}.png")
+    lib = ImageLibrary(str(images), db_path=str(tmp_path / "library.sqlite"))
+    lib.sync()
+    return lib
+
+
+def _fresh(lib):
+    """Same folder and database, without the instance's hand-out memory"""
+    return ImageLibrary(lib.images_dir, db_path=lib.db_path)
+
+
+def test_select_is_reproducible_with_a_seed(library):
+    random.seed(3)
+    first = _fresh(library).select(4)
+    random.seed(3)
+    assert _fresh(library).select(4) == first
+    assert len(set(first)) == 4
+
+
+def test_select_skips_images_in_cooldown(library):
+    used = ["img0.png", "img1.png", "img2.png"]
+    library.mark_used(used)
+    picked = _fresh(library).select(5)
+    assert len(picked) == 5
+    assert not set(picked) & set(used)
+
+
+def test_select_falls_back_to_cooldown_images_last(library):
+    used = ["img0.png", "img1.png", "img2.png"]
+    library.mark_used(used)
+    picked = _fresh(library).select(7)
+    assert len(picked) == 7
+    assert not set(picked[:5]) & set(used)
+    assert set(picked[5:]) <= set(used)
+
+
+def test_select_without_claim_leaves_last_used(library):
+    _fresh(library).select(4)
+    with sqlite3.connect(library.db_path) as conn:
+        assert conn.execute("SELECT MAX(last_used) FROM images").fetchone()[0] == 0
+
+
+def test_claim_puts_images_on_cooldown(library):
+    claimed = _fresh(library).select(3, claim=True)
+    picked = _fresh(library).select(5)
+    assert not set(picked) & set(claimed)
+
+
+def test_shared_library_hands_out_different_images(library):
+    shared = _fresh(library)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(shared.select(4))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not set(results[0]) & set(results[1])
+
+
+# --- Stage graph ---
+def test_stage_graph_runs_stages_after_their_dependencies():
+    log = []
+    lock = threading.Lock()
+
+    def stage(name, *inputs):
+        with lock:
+            log.append(("start", name))
+        time.sleep(0.01)
+        with lock:
+            log.append(("end", name))
+        return (name, inputs)
+
+    async def async_stage(name, *inputs):
+        log.append(("start", name))
+        await asyncio.sleep(0.01)
+        log.append(("end", name))
+        return (name, inputs)
+
+    graph = StageGraph(thread_workers=4)
+    graph.add("a", stage, args=("a",))
+    graph.add("b", async_stage, args=("b",), kind="async")
+    graph.add("c", stage, args=("c",), deps=["a"])
+    graph.add("d", stage, args=("d",), deps=["c", "b"], kind="inline")
+    results = graph.run()
+
+    def position(event, name):
+        return log.index((event, name))
+
+    for name, deps in {"c": ["a"], "d": ["c", "b"]}.items():
+        for dep in deps:
+            assert position("end", dep) < position("start", name)
+    # Dependency results are passed after the fixed args, in the order listed
+    assert results["d"] == ("d", (results["c"], results["b"]))
+    assert results["c"] == ("c", (results["a"],))
+    assert graph.critical_path()[-1] == "d"
+
+
+def test_stage_graph_rejects_unknown_dependencies():
+    graph = StageGraph()
+    with pytest.raises(ValueError):
+        graph.add("b", print, deps=["a"])
@@ -109,44 +109,21 @@ async def generate_edge_tts_voice(text, output_path, voice_name="hi-IN-MadhurNeu
     await communicate.save(output_path)
     print(f"✅ Voice-over saved: {output_path}")
 
-def create_deep_voice_edgetts(text, output_name="voiceover.mp3"):
-    """Wrapper for async edgeTTS voice generation with pydub enhancement"""
-    if not EDGE_TTS_AVAILABLE:
-        raise ImportError("edge-tts not installed! Run: pip install edge-tts")
-    
-    output_path = os.path.join(TEMP_DIR, output_name)
-    
-    # Run async function
-    asyncio.run(generate_edge_tts_voice(text, output_path))
+def create_deep_voice_edgetts(text, output_name="voiceover.wav"):
+    """
+    Processed voice-over written as WAV.
+
+    Uses the shared voice cache (.cache/voices/), so once DEFAULT_QUOTE has
+    been synthesized this test runs without any network access.
+    """
+    from voice_fx import get_voice, write_wav
+    from audio_mix import AUDIO_FPS
     
-    # Further enhancement with pydub for consistency
-    try:
-        from pydub import AudioSegment
-        from pydub.effects import compress_dynamic_range, normalize
-        
-        sound = AudioSegment.from_file(output_path)
-        
-        # Gentle deepening for natural sound
-        octaves = -0.15
-        new_sample_rate = int(sound.frame_rate * (2.0 ** octaves))
-        deep_sound = sound._spawn(sound.raw_data, overrides={'frame_rate': new_sample_rate})
-        deep_sound = deep_sound.set_frame_rate(44100)
-        
-        # Balanced EQ for clarity and naturalness
-        deep_sound = deep_sound.low_pass_filter(3800).high_pass_filter(85)
-        
-        # Normalize and compress for consistency
-        deep_sound = normalize(deep_sound)
-        deep_sound = compress_dynamic_range(deep_sound, threshold=-20.0, ratio=3.0)
-        
-        deep_path = output_path.replace(".mp3", "_deep.mp3")
-        deep_sound.export(deep_path, format="mp3", bitrate="192k")
-        print("🎙️ Voice optimized: Natural + Consistent + Clear")
-        return deep_path
-        
-    except Exception as e:
-        print(f"⚠️ pydub processing skipped: {e}")
-        return output_path
+    output_path = os.path.join(TEMP_DIR, os.path.splitext(output_name)[0] + ".wav")
+    pcm, _ = get_voice(text)
+    write_wav(output_path, pcm, AUDIO_FPS)
+    print("🎙️ Voice optimized: Natural + Consistent + Clear")
+    return output_path
 
 # --- UNIFIED VISUAL FILTER ---
 def apply_unified_filter(image_path, filter_type="cinematic"):
@@ -200,36 +177,8 @@ def apply_unified_filter(image_path, filter_type="cinematic"):
     return img
 
 # --- KEN BURNS EFFECT (ZOOM/PAN) ---
-def apply_ken_burns_effect(clip, zoom_ratio=1.2):
-    """
-    Apply Ken Burns effect (slow zoom and pan) to a clip.
-    
-    Args:
-        clip: ImageClip to apply effect to
-        zoom_ratio: How much to zoom (1.2 = 20% zoom)
-    
-    Returns:
-        Clip with Ken Burns effect applied
-    """
-    w, h = clip.size
-    
-    def zoom_in_effect(t):
-        # Zoom gradually over the duration
-        progress = t / clip.duration
-        current_zoom = 1 + (zoom_ratio - 1) * progress
-        
-        # Calculate new dimensions
-        new_w = int(w * current_zoom)
-        new_h = int(h * current_zoom)
-        
-        # Pan slightly (move from center to slightly off-center)
-        x_offset = int((new_w - w) * progress * 0.5)
-        y_offset = int((new_h - h) * progress * 0.3)
-        
-        return x_offset, y_offset
-    
-    # Apply resize and position changes
-    return clip.resize(lambda t: 1 + (zoom_ratio - 1) * t / clip.duration)
+# Same engine as the real editor, so the test shows the motion that gets posted
+from video_editor import apply_ken_burns_effect
 
 # --- CREATE VIRAL REEL ---
 def create_viral_reel_enhanced():
@@ -265,7 +214,7 @@ def create_viral_reel_enhanced():
     # 3. Generate voice-over
     print("\n🎙️ Step 2: Generate Voice-over")
     try:
-        audio_path = create_deep_voice_edgetts(DEFAULT_QUOTE.strip(), "viral_voice.mp3")
+        audio_path = create_deep_voice_edgetts(DEFAULT_QUOTE.strip(), "viral_voice.wav")
         audio = AudioFileClip(audio_path)
         print(f"   Audio duration: {audio.duration:.1f}s")
     except Exception as e:
@@ -0,0 +1,190 @@
+"""
+⚡ Normalized Transition Cache
+===============================
+Pre-transcodes the transition assets once to the reel's geometry:
+- Scaled/cropped to 1080x1920, resampled to the output fps, audio dropped
+- Stored as raw RGB frames (.npy) that are memory-mapped at render time
+- Rebuilt automatically when an asset's content changes
+- TransitionPool: maps each distinct transition once per render and
+  shares its frames between every use
+
+Run `python transition_cache.py` to normalize all assets ahead of time.
+"""
+
+import os
+import subprocess
+
+import numpy as np
+from moviepy.editor import VideoClip
+
+from disk_cache import DiskCache, file_digest, make_key
+from ken_burns import OUTPUT_SIZE
+
+# --- Configuration ---
+TRANSITIONS_DIR = os.path.join("assets", "transitions")
+TRANSITION_DURATION = 1.0  # Seconds of each transition that the reels use
+TRANSITION_CACHE_MAX_MB = int(os.getenv("TRANSITION_CACHE_MAX_MB", "2048"))
+
+transition_cache = DiskCache("transitions", TRANSITION_CACHE_MAX_MB)
+
+
+def _ffmpeg_exe():
+    from imageio_ffmpeg import get_ffmpeg_exe
+    return get_ffmpeg_exe()
+
+
+def list_transitions(folder=TRANSITIONS_DIR):
+    """Return paths of all transition videos in the assets folder"""
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, f) for f in sorted(os.listdir(folder))
+            if f.lower().endswith(('.mp4', '.mov'))]
+
+
+def _transition_key(src_path, size, fps, duration):
+    return make_key(file_digest(src_path), list(size), fps, duration, "rgb24")
+
+
+def normalize_transition(src_path, size=OUTPUT_SIZE, fps=30, duration=TRANSITION_DURATION):
+    """
+    Return the cached, normalized frames file for a transition, building it if needed.
+
+    Args:
+        src_path: Path to the transition video
+        size: Output frame size (width, height)
+        fps: Output frame rate
+        duration: Seconds to keep from the start of the transition
+
+    Returns:
+        Path to a .npy file of shape (frames, height, width, 3), dtype uint8
+    """
+    key = _transition_key(src_path, size, fps, duration)
+    cached = transition_cache.lookup(key)
+    if cached:
+        return cached
+
+    w, h = size
+    # Same framing as the old resize(height) + center crop, done once by ffmpeg
+    vf = f"fps={fps},scale={w}:{h}:force_original_aspect_ratio=increase,crop={w}:{h}"
+    cmd = [_ffmpeg_exe(), "-v", "error", "-i", src_path, "-t", f"{duration:.3f}",
+           "-an", "-vf", vf, "-pix_fmt", "rgb24", "-f", "rawvideo", "-"]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors="replace").strip() or "ffmpeg failed")
+
+    frames = np.frombuffer(result.stdout, dtype=np.uint8)
+    n_frames = frames.size // (w * h * 3)
+    if n_frames == 0:
+        raise RuntimeError(f"No frames decoded from {src_path}")
+    frames = frames[:n_frames * w * h * 3].reshape(n_frames, h, w, 3)
+
+    return transition_cache.save_array(key, frames)
+
+
+def load_transition_frames(src_path, size=OUTPUT_SIZE, fps=30, duration=TRANSITION_DURATION):
+    """Memory-map the normalized frames of a transition"""
+    return np.load(normalize_transition(src_path, size, fps, duration), mmap_mode="r")
+
+
+def frames_clip(frames, duration, fps=30):
+    """VideoClip that plays pre-rendered frames, holding the last one if it runs short"""
+    last = len(frames) - 1
+
+    def make_frame(t):
+        return frames[min(last, max(0, int(t * fps + 1e-6)))]
+
+    return VideoClip(make_frame, duration=duration)
+
+
+def make_transition_clip(src_path, duration=TRANSITION_DURATION, size=OUTPUT_SIZE, fps=30):
+    """
+    Build a silent, full-frame transition clip from the normalized cache.
+
+    Args:
+        src_path: Path to the transition video
+        duration: Clip duration in seconds
+        size: Output frame size (width, height)
+        fps: Output frame rate
+
+    Returns:
+        VideoClip of exactly `size`
+    """
+    frames = load_transition_frames(src_path, size, fps, max(duration, TRANSITION_DURATION))
+    return frames_clip(frames, duration, fps)
+
+
+class TransitionPool:
+    """
+    Per-render pool of transition frames.
+
+    Each distinct transition is mapped once, no matter how many times the
+    reel uses it; every clip handed out reads from that shared mapping.
+    close() unmaps them right away, so it must only be called once the
+    render's clips are done (their frames are gone afterwards).
+    """
+
+    def __init__(self, size=OUTPUT_SIZE, fps=30):
+        self.size = tuple(size)
+        self.fps = fps
+        self._frames = {}
+        self.uses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def frames(self, src_path, duration=TRANSITION_DURATION):
+        """Shared frames of a transition (mapped on first use)"""
+        if src_path not in self._frames:
+            self._frames[src_path] = load_transition_frames(
+                src_path, self.size, self.fps, max(duration, TRANSITION_DURATION))
+        return self._frames[src_path]
+
+    def clip(self, src_path, duration=TRANSITION_DURATION):
+        """Silent, full-frame transition clip backed by the shared frames"""
+        clip = frames_clip(self.frames(src_path, duration), duration, self.fps)
+        self.uses += 1
+        return clip
+
+    @property
+    def open_count(self):
+        return len(self._frames)
+
+    def close(self):
+        """Unmap every transition held by the pool"""
+        for frames in self._frames.values():
+            mapping = getattr(frames, "_mmap", None)
+            if mapping is not None:
+                try:
+                    mapping.close()
+                except BufferError:
+                    pass  # Still exported elsewhere; unmapped when that is freed
+        self._frames.clear()
+
+
+def prepare_transitions(paths=None, size=OUTPUT_SIZE, fps=30, duration=TRANSITION_DURATION):
+    """
+    Make sure every transition has an up-to-date normalized copy.
+
+    Returns:
+        Number of transitions that had to be (re)built
+    """
+    built = 0
+    for path in (list_transitions() if paths is None else paths):
+        if transition_cache.lookup(_transition_key(path, size, fps, duration)):
+            continue
+        try:
+            normalize_transition(path, size, fps, duration)
+            built += 1
+        except Exception as e:
+            print(f"   ⚠️ Could not normalize {os.path.basename(path)}: {e}")
+    return built
+
+
+if __name__ == "__main__":
+    paths = list_transitions()
+    print(f"⚡ Normalizing {len(paths)} transitions to {OUTPUT_SIZE[0]}x{OUTPUT_SIZE[1]}@30fps...")
+    built = prepare_transitions(paths)
+    print(f"✅ Done ({built} rebuilt, {len(paths) - built} already cached)")
@@ -2,10 +2,10 @@
 🎬 Advanced Video Editor Module
 ================================
 Contains all the video editing functionality with advanced effects:
-- Unified visual filters (cinematic, warm, cool)
+- Unified visual filters (cinematic, warm, cool + .cube LUT looks)
 - Ken Burns effect (zoom/pan motion)
 - Transition effects from assets folder
-- Background music mixing
+- Background music mixing (ducked under the voice)
 - edgeTTS natural and consistent voice generation
 - Optimal 15-second viral reel creation
 - Automatic cleanup of temp files
@@ -18,17 +18,36 @@ if not hasattr(PIL.Image, 'ANTIALIAS'):
 # ----------------------------------------------------
 
 import os
+import json
+import math
 import random
 import shutil
 import time
 import gc
 from moviepy.editor import (
-    ImageClip, concatenate_videoclips, AudioFileClip,
+    ImageClip, concatenate_videoclips,
     CompositeVideoClip, ColorClip
 )
 from moviepy.video.fx import resize, crop, fadein, fadeout
 import numpy as np
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image, ImageFilter, ImageOps
+
+from ken_burns import OUTPUT_SIZE, PAN_DIRECTIONS, make_ken_burns_clip
+from color_grading import grade_image, available_looks, look_fingerprint
+from disk_cache import DiskCache, file_digest, make_key
+from transition_cache import TransitionPool, prepare_transitions, TRANSITION_DURATION
+from ffmpeg_export import write_video_ffmpeg
+from thumbnail_tap import ScoredFrameTap
+from image_library import ImageLibrary
+from audio_mix import load_music, mix_audio, AUDIO_FPS
+from voice_fx import (
+    get_voice, get_voice_async, write_wav, VOICE_NAME, VOICE_RATE, VOICE_PITCH, VOICE_VOLUME
+)
+from render_profiles import get_profile, DEFAULT_PROFILE
+from stage_scheduler import StageGraph
+from parallel_render import (
+    image_segment, transition_segment, build_segment_clip, render_segments_parallel, RENDER_WORKERS
+)
 
 # --- edgeTTS Integration ---
 try:
@@ -46,6 +65,18 @@ ASSETS_DIR = "assets"
 TRANSITIONS_DIR = os.path.join(ASSETS_DIR, "transitions")
 MUSIC_DIR = os.path.join(ASSETS_DIR, "background_music")
 TEMP_DIR = os.path.join(OUTPUT_DIR, "temp")
+DEBUG_DIR = os.path.join(OUTPUT_DIR, "debug")  # Intermediate files kept when debug=True
+ZOOM_RANGE = (1.15, 1.25)  # Ken Burns zoom per image (min, max)
+IMAGE_DURATION = 2.0  # Seconds per image clip
+EXPORT_BACKENDS = ("moviepy", "ffmpeg")
+EXPORT_BACKEND = os.getenv("EXPORT_BACKEND", "moviepy")  # Default when not chosen per render
+RENDER_MODES = ("single", "parallel")
+RENDER_MODE = os.getenv("RENDER_MODE", "single")  # "parallel" = encode segments in a process pool
+FRAME_CACHE_MAX_MB = int(os.getenv("FRAME_CACHE_MAX_MB", "2048"))  # Graded frame cache size
+
+# Graded + cropped source frames, keyed by image content and grading settings
+# (local and batch runs; the CI workflow doesn't keep it between posts)
+frame_cache = DiskCache("frames", FRAME_CACHE_MAX_MB)
 
 
 def ensure_directories():
@@ -81,7 +112,7 @@ def cleanup_temp_files():
 
 
 # --- VOICE-OVER GENERATION WITH edgeTTS ---
-async def generate_edge_tts_voice(text, output_path, voice_name="hi-IN-MadhurNeural"):
+async def generate_edge_tts_voice(text, output_path, voice_name=VOICE_NAME):
     """
     Generate natural-sounding Hindi voice-over using edgeTTS.
     Optimized for consistency and naturalness.
@@ -92,101 +123,107 @@ async def generate_edge_tts_voice(text, output_path, voice_name="hi-IN-MadhurNeu
     communicate = edge_tts.Communicate(
         text=text,
         voice=voice_name,
-        rate="+10%",   # Slightly faster but more natural
-        pitch="-15Hz",  # Moderate deepening for consistency
-        volume="+15%"   # Clear but not overpowering
+        rate=VOICE_RATE,      # Slightly faster but more natural
+        pitch=VOICE_PITCH,    # Moderate deepening for consistency
+        volume=VOICE_VOLUME   # Clear but not overpowering
     )
     
     await communicate.save(output_path)
     print(f"✅ Voice-over saved: {output_path}")
 
 
-def create_deep_voice_edgetts(text, output_name="voiceover.mp3"):
-    """Wrapper for async edgeTTS voice generation with pydub enhancement"""
-    if not EDGE_TTS_AVAILABLE:
-        raise ImportError("edge-tts not installed! Run: pip install edge-tts")
-    
+def create_deep_voice_edgetts(text, output_name="voiceover.wav"):
+    """
+    Generate the processed (deepened, EQ'd, compressed) voice-over as a file.
+
+    The processing runs in memory (see voice_fx.py); the result is written
+    once as lossless WAV. Reels don't need this file - they take the PCM
+    from get_voice() directly.
+    """
     ensure_directories()
-    output_path = os.path.join(TEMP_DIR, output_name)
+    output_path = os.path.join(TEMP_DIR, os.path.splitext(output_name)[0] + ".wav")
     
-    # Run async function
-    asyncio.run(generate_edge_tts_voice(text, output_path))
+    pcm, _ = get_voice(text)
+    write_wav(output_path, pcm, AUDIO_FPS)
+    print("🎙️ Voice optimized: Natural + Consistent + Clear")
+    return output_path
+
+
+def _aspect_crop_box(size, aspect):
+    """Largest centered box with the given width/height ratio"""
+    w, h = size
+    if w / h > aspect:
+        cw = round(h * aspect)
+        return ((w - cw) // 2, 0, (w - cw) // 2 + cw, h)
+    ch = round(w / aspect)
+    return (0, (h - ch) // 2, w, (h - ch) // 2 + ch)
+
+
+def load_source_image(image_path, target_size=None):
+    """
+    Open an image upright, cropped to the reel's aspect ratio and no bigger
+    than it needs to be.
     
-    # Further enhancement with pydub for consistency
-    try:
-        from pydub import AudioSegment
-        from pydub.effects import compress_dynamic_range, normalize
-        
-        sound = AudioSegment.from_file(output_path)
-        
-        # Gentle deepening for natural sound
-        octaves = -0.15
-        new_sample_rate = int(sound.frame_rate * (2.0 ** octaves))
-        deep_sound = sound._spawn(sound.raw_data, overrides={'frame_rate': new_sample_rate})
-        deep_sound = deep_sound.set_frame_rate(44100)
-        
-        # Balanced EQ for clarity and naturalness
-        deep_sound = deep_sound.low_pass_filter(3800).high_pass_filter(85)
-        
-        # Normalize and compress for consistency
-        deep_sound = normalize(deep_sound)
-        deep_sound = compress_dynamic_range(deep_sound, threshold=-20.0, ratio=3.0)
-        
-        deep_path = output_path.replace(".mp3", "_deep.mp3")
-        deep_sound.export(deep_path, format="mp3", bitrate="192k")
-        print("🎙️ Voice optimized: Natural + Consistent + Clear")
-        return deep_path
-        
-    except Exception as e:
-        print(f"⚠️ pydub processing skipped: {e}")
-        return output_path
+    JPEGs are decoded straight to a reduced scale (1/2, 1/4, 1/8) with
+    draft mode, then the image is center-cropped to the aspect ratio of
+    `target_size` and shrunk to exactly cover it. EXIF orientation is applied.
+    
+    Args:
+        image_path: Path to input image
+        target_size: (width, height) the image must cover, or None for full size
+    
+    Returns:
+        RGB PIL Image
+    """
+    img = Image.open(image_path)
+    
+    if target_size:
+        aspect = target_size[0] / target_size[1]
+        # EXIF orientations 5-8 are stored rotated by 90 degrees
+        if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            aspect = 1 / aspect
+        box = _aspect_crop_box(img.size, aspect)
+        scale = max(target_size) / max(box[2] - box[0], box[3] - box[1])
+        if scale < 1.0 and img.format == 'JPEG':
+            img.draft('RGB', (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+    
+    img = ImageOps.exif_transpose(img)
+    img = img.convert('RGB')
+    
+    if target_size:
+        aspect = target_size[0] / target_size[1]
+        img = img.crop(_aspect_crop_box(img.size, aspect))
+        if img.width > target_size[0]:
+            img = img.resize(target_size, Image.BICUBIC, reducing_gap=2.0)
+    
+    return img
+
+
+def cover_size(size=OUTPUT_SIZE, max_zoom=ZOOM_RANGE[1]):
+    """Smallest source size that fills `size` at the strongest Ken Burns zoom"""
+    return (math.ceil(size[0] * max_zoom), math.ceil(size[1] * max_zoom))
 
 
 # --- UNIFIED VISUAL FILTER ---
-def apply_unified_filter(image_path, filter_type="cinematic"):
+def apply_unified_filter(image_path, filter_type="cinematic", target_size=None):
     """
     Apply a consistent visual filter to all images.
     
+    The look is compiled into a single 3D LUT (see color_grading.py) and
+    applied in one pass, followed by a light sharpen. With `target_size` the
+    image is decoded at reduced resolution first, so grading and sharpening
+    only touch the pixels the reel can actually show.
+    
     Args:
         image_path: Path to input image
-        filter_type: Type of filter to apply (cinematic, warm, cool)
+        filter_type: Type of filter to apply (cinematic, warm, cool or a .cube look)
+        target_size: (width, height) the result must cover (default: full resolution)
     
     Returns:
         PIL Image with applied filter
     """
-    img = Image.open(image_path).convert('RGB')
-    
-    if filter_type == "cinematic":
-        # Cinematic look - slight desaturation, enhanced contrast
-        enhancer = ImageEnhance.Contrast(img)
-        img = enhancer.enhance(1.2)
-        
-        enhancer = ImageEnhance.Color(img)
-        img = enhancer.enhance(0.9)
-        
-        enhancer = ImageEnhance.Brightness(img)
-        img = enhancer.enhance(1.05)
-        
-    elif filter_type == "warm":
-        # Warm golden filter
-        enhancer = ImageEnhance.Color(img)
-        img = enhancer.enhance(1.3)
-        
-        # Add warm tint
-        img_array = np.array(img, dtype=np.float32)
-        img_array[:, :, 0] = np.clip(img_array[:, :, 0] * 1.1, 0, 255)  # Red
-        img_array[:, :, 2] = np.clip(img_array[:, :, 2] * 0.9, 0, 255)  # Blue
-        img = Image.fromarray(img_array.astype(np.uint8))
-        
-    elif filter_type == "cool":
-        # Cool blue filter
-        enhancer = ImageEnhance.Color(img)
-        img = enhancer.enhance(1.2)
-        
-        img_array = np.array(img, dtype=np.float32)
-        img_array[:, :, 2] = np.clip(img_array[:, :, 2] * 1.1, 0, 255)  # Blue
-        img_array[:, :, 0] = np.clip(img_array[:, :, 0] * 0.9, 0, 255)  # Red
-        img = Image.fromarray(img_array.astype(np.uint8))
+    img = load_source_image(image_path, target_size)
+    img = grade_image(img, filter_type)
     
     # Slight sharpening for all filters
     img = img.filter(ImageFilter.SHARPEN)
@@ -194,32 +231,285 @@ def apply_unified_filter(image_path, filter_type="cinematic"):
     return img
 
 
+def get_graded_frame(image_path, filter_type="cinematic", target_size=None, digest=None):
+    """
+    Return the filtered, 9:16-cropped pixels of an image, using the frame cache.
+    
+    Entries are keyed by the image's content hash, the look, the target size
+    and the crop, so an edited image or changed .cube look is regraded
+    automatically.
+    
+    Args:
+        image_path: Path to input image
+        filter_type: Type of filter to apply
+        target_size: (width, height) the frame must cover
+        digest: The image's SHA-1 if already known (the image library
+                stores it), else it is looked up with file_digest()
+    
+    Returns:
+        HxWx3 uint8 numpy array
+    """
+    key = make_key(digest or file_digest(image_path), filter_type, look_fingerprint(filter_type),
+                   target_size, "center-crop", "sharpen")
+    
+    frame = frame_cache.load_array(key)
+    if frame is not None:
+        return frame
+    
+    frame = np.asarray(apply_unified_filter(image_path, filter_type, target_size))
+    try:
+        frame_cache.save_array(key, frame)
+    except OSError as e:
+        print(f"   ⚠️ Could not cache graded frame: {e}")
+    return frame
+
+
 # --- KEN BURNS EFFECT (ZOOM/PAN) ---
-def apply_ken_burns_effect(clip, zoom_ratio=1.2):
+def apply_ken_burns_effect(clip, zoom_ratio=1.2, pan="center"):
     """
     Apply Ken Burns effect (slow zoom and pan) to a clip.
     
+    Still images go through the Ken Burns engine (plan_ken_burns() boxes,
+    one crop-and-scale per frame); other clips fall back to a per-frame resize.
+    
     Args:
         clip: ImageClip to apply effect to
         zoom_ratio: How much to zoom (1.2 = 20% zoom)
+        pan: Pan direction (see PAN_DIRECTIONS)
     
     Returns:
         Clip with Ken Burns effect applied
     """
-    # Apply resize that gradually zooms in over the duration
+    if getattr(clip, 'img', None) is not None:
+        return make_ken_burns_clip(clip.img, clip.duration, zoom_ratio, pan, size=tuple(clip.size))
     return clip.resize(lambda t: 1 + (zoom_ratio - 1) * t / clip.duration)
 
 
+# --- BUILD STAGES (run concurrently by StageGraph) ---
+async def _voice_stage(hindi_text, debug=False):
+    """Voice-over PCM (cache or edge-tts), or None if generation fails"""
+    print("   🎙️ Generating voice-over...")
+    try:
+        # Processed PCM from the voice cache, or edge-tts stream -> PCM in memory
+        voice_pcm, _ = await get_voice_async(hindi_text)
+    except Exception as e:
+        print(f"   ❌ Voice generation failed: {e}")
+        print("   💡 Creating video without voice")
+        return None
+    print(f"   🎙️ Voice ready: {len(voice_pcm) / AUDIO_FPS:.1f}s (Natural + Consistent + Clear)")
+    if debug:
+        os.makedirs(DEBUG_DIR, exist_ok=True)
+        write_wav(os.path.join(DEBUG_DIR, "viral_voice_deep.wav"), voice_pcm, AUDIO_FPS)
+    return voice_pcm
+
+
+def _music_stage(music_path):
+    """Background music PCM, decoded once and memory-mapped from the cache"""
+    music_pcm = load_music(music_path)
+    print(f"   🎵 Music ready: {os.path.basename(music_path)}")
+    return music_pcm
+
+
+def _transitions_stage(paths, frame_size, fps):
+    """Make sure every transition is normalized to the profile's size and fps"""
+    built = prepare_transitions(paths, frame_size, fps, TRANSITION_DURATION)
+    print(f"   ⚡ {len(paths)} transition effects ready" + (f" ({built} normalized)" if built else ""))
+    return built
+
+
+def _images_stage(library, num_images):
+    """
+    Step 1: up to `num_images` usable images from the indexed library.
+
+    Returns:
+        List of (file name, sha1) - the library's content hash keys the frame cache
+    """
+    print("\n🖼️ Step 1: Selecting random images")
+    library.sync()
+    available = library.count(usable_only=True)
+    if not available:
+        raise ValueError(f"❌ No usable images found in '{IMAGES_DIR}/' folder!")
+    # Not marked as used here: main.py does that once the reel is posted
+    selected_images = library.select(num_images)
+    print(f"   Selected {len(selected_images)} random images from {available} available")
+    digests = library.digests(selected_images)
+    return [(name, digests.get(name)) for name in selected_images]
+
+
+def _grade_stage(index, filter_type, target_size, selection):
+    """Graded frame of the index-th selected image (None if fewer were selected)"""
+    if index >= len(selection):
+        return None
+    name, digest = selection[index]
+    return get_graded_frame(os.path.join(IMAGES_DIR, name), filter_type, target_size, digest)
+
+
+def _assemble_stage(filter_type, motions, gap_transitions, frame_size, fps, debug, selection, *inputs):
+    """
+    Steps 6-7: Ken Burns clips with transitions between them, concatenated.
+
+    `inputs` are the graded frames (one per planned image) followed by the
+    transitions stage's result, if there is one.
+
+    Returns:
+        Dict with the clips, the timeline segments, the transition pool and
+        the concatenated video
+    """
+    selected_images = [name for name, _ in selection]
+    num_images = len(selected_images)
+    frames = inputs[:len(motions)]
+    print(f"\n🎨 Step 6: Creating {num_images} clips with motion and transitions")
+    
+    transition_pool = TransitionPool(frame_size, fps)  # Each distinct transition opened once
+    clips = []
+    final_clips = []
+    segments = []  # Timeline description used by the parallel renderer
+    
+    for i, img_file in enumerate(selected_images):
+        frame = frames[i]
+        
+        if debug:
+            os.makedirs(DEBUG_DIR, exist_ok=True)
+            Image.fromarray(frame).save(os.path.join(DEBUG_DIR, f"filtered_{i:03d}.jpg"), quality=95)
+        
+        # Create clip with Ken Burns effect (zoom + pan, rendered straight to 9:16)
+        zoom_ratio, pan = motions[i]
+        spec = image_segment(frame, IMAGE_DURATION, zoom_ratio, pan)
+        clip = build_segment_clip(spec, frame_size, fps)
+        
+        clips.append(clip)
+        final_clips.append(clip)
+        segments.append(spec)
+        print(f"   ✓ Clip {i+1}/{num_images} created (filter: {filter_type}, zoom: {zoom_ratio:.2f}x, pan: {pan})")
+        
+        # Add transition after each clip except the last one
+        if i < num_images - 1 and gap_transitions[i]:
+            trans_path = gap_transitions[i]
+            try:
+                # Pre-normalized, silent 9:16 frames shared through the pool
+                spec = transition_segment(trans_path, TRANSITION_DURATION)
+                trans_clip = build_segment_clip(spec, frame_size, fps, transition_pool)
+                
+                final_clips.append(trans_clip)
+                segments.append(spec)
+                print(f"   ✓ Added transition {i+1}")
+                
+            except Exception as e:
+                print(f"   ⚠️ Failed to load transition {os.path.basename(trans_path)}: {e}")
+    
+    if transition_pool.uses:
+        print(f"   {transition_pool.uses} transition(s) from {transition_pool.open_count} shared source(s)")
+    
+    print(f"\n🎬 Step 7: Combining clips")
+    video = concatenate_videoclips(final_clips, method="compose")
+    print(f"   Video duration: {video.duration:.2f}s")
+    
+    return {"clips": clips, "final_clips": final_clips, "segments": segments,
+            "pool": transition_pool, "video": video}
+
+
+def _audio_stage(sources, timeline, *pcm):
+    """Step 8: voice + music mixed in one vectorized pass, music ducked under speech"""
+    print(f"\n🎙️ Step 8: Adding audio")
+    pcm = dict(zip(sources, pcm))
+    voice_pcm, music_pcm = pcm.get("voice"), pcm.get("music")
+    mixed_audio = mix_audio(timeline["video"].duration, voice_pcm, music_pcm)
+    if mixed_audio is not None:
+        if voice_pcm is not None and music_pcm is not None:
+            print("   ✓ Mixed voice with background music (ducked under speech)")
+        elif voice_pcm is not None:
+            print("   ✓ Added voice-over")
+        else:
+            print("   ✓ Added background music only")
+    return mixed_audio
+
+
+def _export_stage(output_path, render_mode, export_backend, settings, graph, timeline, mixed_audio):
+    """
+    Step 9: encode the reel (parallel segments go to the graph's worker processes).
+
+    Returns:
+        (video with its audio, thumbnail tap holding the best frame)
+    """
+    final_video = timeline["video"]
+    segments = timeline["segments"]
+    if mixed_audio is not None:
+        final_video = final_video.set_audio(mixed_audio)
+    frame_size, fps = settings["size"], settings["fps"]
+    
+    if render_mode == "parallel":
+        print(f"\n💾 Step 9: Exporting final video ({len(segments)} parallel segments)...")
+    else:
+        print(f"\n💾 Step 9: Exporting final video ({export_backend})...")
+    
+    # Best-scoring frame (sharp, contrasty, well lit, not mid-transition)
+    # kept in memory while rendering - no re-decode of the MP4
+    transition_spans = []
+    position = 0.0
+    for spec in segments:
+        if spec["kind"] == "transition":
+            transition_spans.append((position, position + spec["duration"]))
+        position += spec["duration"]
+    thumbnail_tap = ScoredFrameTap(transitions=transition_spans)
+    
+    if render_mode == "parallel":
+        # Segments encoded side by side with identical settings, joined by stream copy
+        render_segments_parallel(
+            segments,
+            output_path,
+            audio=final_video.audio,
+            size=frame_size,
+            fps=fps,
+            codec='libx264',
+            audio_codec='aac',
+            preset=settings['preset'],
+            crf=settings['crf'],
+            threads=settings['threads'],  # None = CPUs split between the workers
+            workers=graph.process_workers,
+            work_dir=TEMP_DIR,
+            tap=thumbnail_tap,
+            pool=graph.processes  # Forked before the stage threads started
+        )
+    elif export_backend == "ffmpeg":
+        # Frames and PCM audio streamed straight into one ffmpeg process
+        write_video_ffmpeg(
+            final_video,
+            output_path,
+            fps=fps,
+            codec='libx264',
+            audio_codec='aac',
+            threads=settings['threads'],
+            preset=settings['preset'],
+            crf=settings['crf'],
+            tap=thumbnail_tap
+        )
+    else:
+        thumbnail_tap.wrap(final_video).write_videofile(
+            output_path,
+            fps=fps,
+            codec='libx264',
+            audio_codec='aac',
+            threads=settings['threads'],
+            preset=settings['preset'],
+            ffmpeg_params=['-crf', str(settings['crf'])] if settings['crf'] is not None else None,
+            verbose=False,
+            logger=None
+        )
+    return final_video, thumbnail_tap
+
+
 # --- CREATE VIRAL REEL WITH ADVANCED EFFECTS ---
 def create_viral_reel_advanced(hindi_text, output_name="viral_reel_auto.mp4", use_voice=True, 
                                num_images=None, filter_type=None, use_transitions=True, 
-                               use_background_music=True):
+                               use_background_music=True, debug=False, export_backend=None,
+                               render_mode=None, render_workers=None, profile=None,
+                               music=None, cleanup=True, library=None, processes=None):
     """
     Create viral reel with advanced effects:
     - 6-7 random images with unified filter
     - 2 seconds per image with Ken Burns motion effect
     - 1 second transition effects from assets
-    - Background music mixed with voice
+    - Background music mixed with voice (ducked under speech)
     - More consistent and natural voice
     
     Args:
@@ -227,232 +517,137 @@ def create_viral_reel_advanced(hindi_text, output_name="viral_reel_auto.mp4", us
         output_name: Output video filename
         use_voice: Whether to generate voice-over (default: True)
         num_images: Number of images to use (default: random 6-7)
-        filter_type: Visual filter type (cinematic/warm/cool, default: random)
+        filter_type: Visual filter type (cinematic/warm/cool or a .cube look, default: random)
         use_transitions: Use transition effects from assets (default: True)
         use_background_music: Add background music (default: True)
+        debug: Also write intermediate files (filtered frames, processed voice) to output/debug/ (default: False)
+        export_backend: "moviepy" (write_videofile) or "ffmpeg" (direct streaming),
+                        default: EXPORT_BACKEND environment variable or "moviepy"
+        render_mode: "single" (one export pass) or "parallel" (segments encoded
+                     in a process pool and joined by stream copy),
+                     default: RENDER_MODE environment variable or "single"
+        render_workers: Worker processes for grading and parallel mode (default: one per CPU)
+        profile: Render profile - "draft", "preview" or "final" (resolution, fps,
+                 preset, CRF, threads), default: RENDER_PROFILE environment
+                 variable or "final"
+        music: Background music file name in assets/background_music/ or a path
+               (default: random track)
+        cleanup: Delete output/temp/ when done (default: True; batch renders
+                 clean up once after all jobs)
+        library: ImageLibrary to pick images from (default: one over images/;
+                 batch jobs share one so they get different images)
+        processes: Running process pool for grading and parallel mode (default:
+                   one of `render_workers` processes per render; batch jobs
+                   share one so the batch never runs more than that)
     
     Returns:
         Path to created video file
     """
     print("\n🎬 Creating Enhanced Viral Reel...")
     
-    ensure_directories()
+    render_mode = render_mode or RENDER_MODE
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"❌ Unknown render mode '{render_mode}'. Use one of: {', '.join(RENDER_MODES)}")
+    profile = profile or DEFAULT_PROFILE
+    settings = get_profile(profile)
+    frame_size, fps = settings["size"], settings["fps"]
+    print(f"   Render profile: {profile} ({frame_size[0]}x{frame_size[1]}@{fps}fps, {settings['preset']})")
     
-    # 1. Get random images (6-7 images)
-    print("\n🖼️ Step 1: Selecting random images")
-    image_files = [f for f in os.listdir(IMAGES_DIR) if f.lower().endswith(('.jpg', '.png', '.jpeg'))]
+    ensure_directories()
     
-    if not image_files:
-        raise ValueError(f"❌ No images found in '{IMAGES_DIR}/' folder!")
+    output_path = os.path.join(OUTPUT_DIR, output_name)
+    export_backend = export_backend or EXPORT_BACKEND
+    if export_backend not in EXPORT_BACKENDS:
+        raise ValueError(f"❌ Unknown export backend '{export_backend}'. Use one of: {', '.join(EXPORT_BACKENDS)}")
     
-    # Select 6-7 random images (or specified number)
+    # Plan every random choice up front so the stages below can run in any order
     if num_images is None:
         num_images = random.randint(6, 7)
-    num_images = min(num_images, len(image_files))
-    selected_images = random.sample(image_files, num_images)
-    
-    print(f"   Selected {num_images} random images from {len(image_files)} available")
-    
-    # 2. Select random filter (or use specified)
     if filter_type is None:
-        filters = ["cinematic", "warm", "cool"]
-        filter_type = random.choice(filters)
+        filter_type = random.choice(available_looks())
     print(f"   Selected filter: {filter_type}")
     
-    # 3. Generate voice-over
-    audio_path = None
-    audio = None
-    
-    if use_voice:
-        print("\n🎙️ Step 2: Generate Voice-over")
-        try:
-            audio_path = create_deep_voice_edgetts(hindi_text, "viral_voice.mp3")
-            audio = AudioFileClip(audio_path)
-            print(f"   Audio duration: {audio.duration:.1f}s")
-        except Exception as e:
-            print(f"❌ Voice generation failed: {e}")
-            print("💡 Creating video without voice")
-            audio_path = None
-            audio = None
-    else:
-        print("\n🎬 Step 2: Skipping voice-over (silent mode)")
-    
-    # 4. Select random background music
-    bg_music = None
     selected_music_name = None
+    music_path = None
+    if use_background_music and music:
+        music_path = music if os.path.exists(music) else os.path.join(MUSIC_DIR, music)
+        if not os.path.exists(music_path):
+            raise ValueError(f"❌ Background music '{music}' not found")
+        selected_music_name = os.path.basename(music_path)
+    elif use_background_music and os.path.exists(MUSIC_DIR):
+        music_files = [f for f in os.listdir(MUSIC_DIR) if f.lower().endswith('.mp3')]
+        if music_files:
+            selected_music_name = random.choice(music_files)
+            music_path = os.path.join(MUSIC_DIR, selected_music_name)
     
-    if use_background_music:
-        print("\n🎵 Step 3: Select background music")
-        if os.path.exists(MUSIC_DIR):
-            music_files = [f for f in os.listdir(MUSIC_DIR) if f.lower().endswith('.mp3')]
-            
-            if music_files:
-                selected_music = random.choice(music_files)
-                selected_music_name = selected_music
-                music_path = os.path.join(MUSIC_DIR, selected_music)
-                bg_music = AudioFileClip(music_path)
-                print(f"   Selected: {selected_music}")
-            else:
-                print("   No background music found")
-        else:
-            print("   Background music folder not found")
-    else:
-        print("\n🎵 Step 3: Skipping background music")
-    
-    # 5. Get transition effects
-    print("\n⚡ Step 4: Loading transition effects")
     transition_files = []
-    
     if use_transitions and os.path.exists(TRANSITIONS_DIR):
         transition_files = [f for f in os.listdir(TRANSITIONS_DIR) if f.lower().endswith(('.mp4', '.mov'))]
-        
-        if not transition_files:
-            print("   No transition effects found, will use Ken Burns only")
-        else:
-            print(f"   Found {len(transition_files)} transition effects")
-    else:
-        print("   Transition effects disabled or folder not found")
-    
-    # 6. Create image clips with unified filter and Ken Burns effect
-    print(f"\n🎨 Step 5: Creating {num_images} clips with filter and motion")
+    transition_paths = [os.path.join(TRANSITIONS_DIR, f) for f in transition_files]
     
-    clips = []
-    image_duration = 2.0  # 2 seconds per image
-    
-    for i, img_file in enumerate(selected_images):
-        img_path = os.path.join(IMAGES_DIR, img_file)
-        
-        # Apply unified filter
-        filtered_img = apply_unified_filter(img_path, filter_type)
-        
-        # Save temp filtered image
-        temp_path = os.path.join(TEMP_DIR, f"filtered_{i:03d}.jpg")
-        filtered_img.save(temp_path, quality=95)
-        
-        # Create clip with Ken Burns effect
-        clip = ImageClip(temp_path).set_duration(image_duration)
-        
-        # Resize to 9:16 (1080x1920)
-        clip = clip.resize(height=1920)
-        if clip.w < 1080:
-            clip = clip.resize(width=1080)
-        clip = clip.crop(x1=clip.w/2 - 540, width=1080, height=1920)
-        
-        # Apply Ken Burns effect (zoom in)
-        zoom_ratio = random.uniform(1.15, 1.25)
-        clip = apply_ken_burns_effect(clip, zoom_ratio)
-        
-        clips.append(clip)
-        print(f"   ✓ Clip {i+1}/{num_images} created (filter: {filter_type}, zoom: {zoom_ratio:.2f}x)")
-    
-    # 7. Add transition effects between clips
-    print(f"\n🎞️ Step 6: Adding transition effects")
+    # Drawn for the requested count; fewer may be selected (only the first ones are used)
+    motions = [(random.uniform(*ZOOM_RANGE), random.choice(PAN_DIRECTIONS)) for _ in range(num_images)]
+    gap_transitions = [random.choice(transition_paths) if transition_paths else None
+                       for _ in range(num_images - 1)]
     
-    transition_duration = 1.0  # 1 second transitions
-    final_clips = []
+    # Build graph: image selection -> grading (worker processes) -> assembly,
+    # TTS on the event loop, music and transitions in threads, audio mix
+    # once voice and music are ready, export when everything is
+    print("\n⚙️ Steps 1-9: Building the reel as a stage graph")
+    source_size = cover_size(frame_size)  # Decode/grade only what the max zoom needs
+    graph = StageGraph(process_workers=render_workers or RENDER_WORKERS, processes=processes)
     
-    for i, clip in enumerate(clips):
-        # Add the main clip
-        final_clips.append(clip)
-        
-        # Add transition after each clip except the last one
-        if i < len(clips) - 1 and transition_files:
-            # Pick a random transition
-            trans_file = random.choice(transition_files)
-            trans_path = os.path.join(TRANSITIONS_DIR, trans_file)
-            
-            try:
-                from moviepy.editor import VideoFileClip
-                trans_clip = VideoFileClip(trans_path)
-                trans_clip = trans_clip.set_duration(transition_duration)
-                
-                # Resize transition to 9:16
-                trans_clip = trans_clip.resize(height=1920)
-                if trans_clip.w < 1080:
-                    trans_clip = trans_clip.resize(width=1080)
-                trans_clip = trans_clip.crop(x1=trans_clip.w/2 - 540, width=1080, height=1920)
-                
-                # Remove audio from transition
-                trans_clip = trans_clip.without_audio()
-                
-                final_clips.append(trans_clip)
-                print(f"   ✓ Added transition {i+1}")
-                
-            except Exception as e:
-                print(f"   ⚠️ Failed to load transition {trans_file}: {e}")
+    # Indexed library: only new/changed files are analyzed, too small or
+    # blurry images are skipped and recently used ones are picked last
+    graph.add("images", _images_stage, args=(library or ImageLibrary(IMAGES_DIR), num_images), kind="thread")
     
-    # 8. Combine all clips
-    print(f"\n🎬 Step 7: Combining clips")
-    final_video = concatenate_videoclips(final_clips, method="compose")
+    audio_deps = []
+    if use_voice:
+        audio_deps.append(graph.add("voice", _voice_stage, args=(hindi_text, debug), kind="async"))
+    else:
+        print("   🎬 Skipping voice-over (silent mode)")
     
-    print(f"   Video duration: {final_video.duration:.2f}s")
+    if music_path:
+        audio_deps.append(graph.add("music", _music_stage, args=(music_path,), kind="thread"))
+    elif use_background_music:
+        print("   🎵 No background music found")
+    else:
+        print("   🎵 Skipping background music")
     
-    # 9. Add audio (voice + background music)
-    print(f"\n🎙️ Step 8: Adding audio")
+    assemble_deps = ["images"]
+    for i in range(num_images):
+        # Apply unified filter (or reuse the cached result) - pixels come back in memory
+        assemble_deps.append(graph.add(f"grade:{i}", _grade_stage, args=(i, filter_type, source_size),
+                                       deps=["images"], kind="process"))
     
-    if audio_path and audio:
-        # Mix voice with background music
-        if bg_music:
-            # Reduce background music volume to not overpower voice
-            bg_music_reduced = bg_music.volumex(0.3)
-            
-            # Loop background music if shorter than video
-            if bg_music_reduced.duration < final_video.duration:
-                from moviepy.editor import concatenate_audioclips
-                loops_needed = int(final_video.duration / bg_music_reduced.duration) + 1
-                bg_music_list = [bg_music_reduced] * loops_needed
-                bg_music_reduced = concatenate_audioclips(bg_music_list)
-            
-            # Trim to video duration
-            bg_music_reduced = bg_music_reduced.subclip(0, min(bg_music_reduced.duration, final_video.duration))
-            
-            # Mix audio (voice + music)
-            from moviepy.audio.AudioClip import CompositeAudioClip
-            
-            # Trim voice to video duration
-            audio_trimmed = audio.subclip(0, min(audio.duration, final_video.duration))
-            
-            mixed_audio = CompositeAudioClip([audio_trimmed, bg_music_reduced])
-            final_video = final_video.set_audio(mixed_audio)
-            print("   ✓ Mixed voice with background music")
-        else:
-            # Just voice
-            final_video = final_video.set_audio(audio.subclip(0, min(audio.duration, final_video.duration)))
-            print("   ✓ Added voice-over")
-    elif bg_music:
-        # Just background music
-        if bg_music.duration < final_video.duration:
-            from moviepy.editor import concatenate_audioclips
-            loops_needed = int(final_video.duration / bg_music.duration) + 1
-            bg_music_list = [bg_music] * loops_needed
-            bg_music = concatenate_audioclips(bg_music_list)
-        bg_music = bg_music.subclip(0, min(bg_music.duration, final_video.duration))
-        final_video = final_video.set_audio(bg_music)
-        print("   ✓ Added background music only")
-    
-    # 10. Export
-    output_path = os.path.join(OUTPUT_DIR, output_name)
-    print(f"\n💾 Step 9: Exporting final video...")
-    
-    final_video.write_videofile(
-        output_path,
-        fps=30,
-        codec='libx264',
-        audio_codec='aac',
-        threads=4,
-        preset='medium',
-        verbose=False,
-        logger=None
-    )
+    if transition_paths:
+        assemble_deps.append(graph.add("transitions", _transitions_stage,
+                                       args=(transition_paths, frame_size, fps), kind="thread"))
+    else:
+        print("   ⚡ Transition effects disabled or not found, will use Ken Burns only")
+    
+    graph.add("assemble", _assemble_stage,
+              args=(filter_type, motions, gap_transitions, frame_size, fps, debug),
+              deps=assemble_deps, kind="thread")
+    graph.add("audio", _audio_stage, args=(tuple(audio_deps),), deps=["assemble", *audio_deps], kind="thread")
+    graph.add("export", _export_stage,
+              args=(output_path, render_mode, export_backend, settings, graph),
+              deps=["assemble", "audio"], kind="thread")
+    
+    results = graph.run()
+    graph.report()
+    selected_images = [name for name, _ in results["images"]]
+    num_images = len(selected_images)
+    voice_pcm = results.get("voice")
+    music_pcm = results.get("music")
+    timeline = results["assemble"]
+    clips, final_clips, transition_pool = timeline["clips"], timeline["final_clips"], timeline["pool"]
+    final_video, thumbnail_tap = results["export"]
     
     # 11. Close clips to release file handles
     print("\n🔒 Closing video clips...")
     try:
         final_video.close()
-        if audio_path and audio:
-            audio.close()
-        if bg_music:
-            bg_music.close()
         for clip in clips:
             try:
                 clip.close()
@@ -463,6 +658,7 @@ def create_viral_reel_advanced(hindi_text, output_name="viral_reel_auto.mp4", us
                 clip.close()
             except:
                 pass
+        transition_pool.close()
     except Exception as e:
         print(f"   ⚠️ Warning closing clips: {e}")
     
@@ -473,8 +669,9 @@ def create_viral_reel_advanced(hindi_text, output_name="viral_reel_auto.mp4", us
     time.sleep(0.5)
     
     # 12. Cleanup temp files
-    print("🗑️  Cleaning up temp files...")
-    cleanup_temp_files()
+    if cleanup:
+        print("🗑️  Cleaning up temp files...")
+        cleanup_temp_files()
     
     # Success message
     file_size = os.path.getsize(output_path) / 1024 / 1024
@@ -484,21 +681,68 @@ def create_viral_reel_advanced(hindi_text, output_name="viral_reel_auto.mp4", us
     print("="*60)
     print(f"📹 File: {output_path}")
     print(f"⏱️  Duration: {final_video.duration:.1f}s")
-    print(f"🖼️  Images: {num_images} ({image_duration}s each)")
+    print(f"🎚️ Profile: {profile} ({frame_size[0]}x{frame_size[1]}@{fps}fps)")
+    print(f"🖼️  Images: {num_images} ({IMAGE_DURATION}s each)")
     print(f"🎨 Filter: {filter_type}")
     print(f"⚡ Motion: Ken Burns effect on all images")
     print(f"🎬 Transitions: {len(transition_files) if transition_files else 'None'}")
-    print(f"�️ Voice: {'Consistent Natural Hindi' if audio_path else 'None'}")
-    print(f"🎵 Music: {selected_music_name if bg_music else 'None'}")
+    print(f"�️ Voice: {'Consistent Natural Hindi' if voice_pcm is not None else 'None'}")
+    print(f"🎵 Music: {selected_music_name if music_pcm is not None else 'None'}")
     print(f"💾 File size: {file_size:.1f} MB")
-    print(f"✨ Output folder: Clean (temp files deleted)")
+    if cleanup:
+        print(f"✨ Output folder: Clean (temp files deleted)")
     print("="*60)
     
+    # What the uploader needs to know, so it does not have to re-probe the MP4
+    thumbnail_path = thumbnail_tap.save(output_path + ".jpg")
+    write_render_info(output_path, final_video.duration, frame_size, fps, profile, thumbnail_path, selected_images)
+    
     return output_path
 
 
+def write_render_info(video_path, duration, size, fps, profile=None, thumbnail=None, images=None):
+    """Save a rendered reel's duration, size, thumbnail and images next to it as <video>.json"""
+    info = {
+        "duration": round(float(duration), 3),
+        "width": int(size[0]),
+        "height": int(size[1]),
+        "fps": fps,
+        "profile": profile,
+        "thumbnail": thumbnail,
+        "images": list(images or []),
+        "file_size": os.path.getsize(video_path),
+        "mtime": os.path.getmtime(video_path),
+    }
+    with open(video_path + ".json", "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def read_render_info(video_path):
+    """
+    Render info saved by write_render_info(), or None if it is missing or
+    stale (the video was replaced or modified after it was written).
+    """
+    try:
+        with open(video_path + ".json", "r", encoding="utf-8") as f:
+            info = json.load(f)
+        if info["file_size"] != os.path.getsize(video_path) or info["mtime"] != os.path.getmtime(video_path):
+            return None
+        return info
+    except (OSError, ValueError, KeyError):
+        return None
+
+
 def generate_thumbnail(video_path):
-    """Extract middle frame from video as thumbnail for Instagram."""
+    """
+    Thumbnail for Instagram: the one captured while rendering, or else the
+    middle frame extracted from the video.
+    """
+    info = read_render_info(video_path)
+    if info and info.get("thumbnail") and os.path.exists(info["thumbnail"]):
+        print(f"📸 Thumbnail captured during render: {info['thumbnail']}")
+        return info["thumbnail"]
+    
     print("📸 Generating thumbnail...")
     from moviepy.editor import VideoFileClip
     
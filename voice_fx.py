@@ -0,0 +1,272 @@
+"""
+🎙️ In-Memory Voice Pipeline
+============================
+edge-tts stream -> PCM -> deepen/EQ -> normalize/compress, without a
+single intermediate file or lossy re-encode:
+- The MP3 stream from edge-tts is collected in memory with word timings
+- It is decoded exactly once; deepening and EQ run inside that same
+  ffmpeg decode pass
+- Peak normalization and compression are vectorized numpy
+- The result is float32 PCM that goes straight to the mixer
+- Processed voices are cached by content (text, voice settings and
+  processing version), so repeated texts need no network at all
+"""
+
+import asyncio
+import json
+import os
+import re
+import subprocess
+import unicodedata
+import wave
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from audio_mix import AUDIO_FPS, CHANNELS
+from disk_cache import DiskCache, make_key
+
+# --- edgeTTS Integration ---
+try:
+    import edge_tts
+    EDGE_TTS_AVAILABLE = True
+except ImportError:
+    EDGE_TTS_AVAILABLE = False
+
+# --- Configuration ---
+VOICE_NAME = "hi-IN-MadhurNeural"
+VOICE_RATE = "+10%"     # Slightly faster but more natural
+VOICE_PITCH = "-15Hz"   # Moderate deepening for consistency
+VOICE_VOLUME = "+15%"   # Clear but not overpowering
+EDGE_TTS_SAMPLE_RATE = 24000  # edge-tts streams 24 kHz mono MP3
+
+# Post-processing (same chain as the old pydub version)
+DEEPEN_OCTAVES = -0.15
+LOW_PASS_HZ = 3800
+HIGH_PASS_HZ = 85
+NORMALIZE_HEADROOM_DB = 0.1
+COMPRESS_THRESHOLD_DB = -20.0
+COMPRESS_RATIO = 3.0
+COMPRESS_ATTACK = 0.005   # Seconds
+COMPRESS_RELEASE = 0.05   # Seconds
+POSTPROC_VERSION = 1      # Bump when the processing above changes
+VOICE_CACHE_MAX_MB = int(os.getenv("VOICE_CACHE_MAX_MB", "256"))
+
+voice_cache = DiskCache("voices", VOICE_CACHE_MAX_MB)
+
+_TICKS_PER_SECOND = 10_000_000  # edge-tts offsets are in 100 ns units
+
+
+def _ffmpeg_exe():
+    from imageio_ffmpeg import get_ffmpeg_exe
+    return get_ffmpeg_exe()
+
+
+async def stream_edge_tts(text, voice_name=VOICE_NAME, rate=VOICE_RATE, pitch=VOICE_PITCH,
+                          volume=VOICE_VOLUME):
+    """
+    Synthesize speech with edgeTTS, keeping the stream in memory.
+
+    Returns:
+        (mp3_bytes, word_boundaries) where each boundary is a dict with
+        "text", "offset" and "duration" (seconds)
+    """
+    communicate = edge_tts.Communicate(text=text, voice=voice_name, rate=rate, pitch=pitch,
+                                       volume=volume, boundary="WordBoundary")
+    audio = bytearray()
+    words = []
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            audio.extend(chunk["data"])
+        elif chunk["type"] == "WordBoundary":
+            words.append({
+                "text": chunk["text"],
+                "offset": chunk["offset"] / _TICKS_PER_SECOND,
+                "duration": chunk["duration"] / _TICKS_PER_SECOND,
+            })
+    if not audio:
+        raise RuntimeError("edge-tts returned no audio")
+    return bytes(audio), words
+
+
+def decode_voice(mp3_bytes, fps=AUDIO_FPS, channels=CHANNELS):
+    """
+    Decode the edge-tts MP3 from memory, deepened and EQ'd in the same pass.
+
+    The pitch drop reinterprets the samples at a lower rate (slower and
+    deeper, like pydub's frame-rate override) before resampling to `fps`.
+    """
+    deep_rate = int(EDGE_TTS_SAMPLE_RATE * (2.0 ** DEEPEN_OCTAVES))
+    af = (f"aresample={EDGE_TTS_SAMPLE_RATE},asetrate={deep_rate},aresample={fps},"
+          f"lowpass=f={LOW_PASS_HZ}:p=1,highpass=f={HIGH_PASS_HZ}:p=1")
+    cmd = [_ffmpeg_exe(), "-v", "error", "-f", "mp3", "-i", "pipe:0", "-af", af,
+           "-f", "f32le", "-acodec", "pcm_f32le", "-ar", str(fps), "-ac", str(channels), "-"]
+    result = subprocess.run(cmd, input=mp3_bytes, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors="replace").strip() or "ffmpeg could not decode the voice")
+    pcm = np.frombuffer(result.stdout, dtype=np.float32)
+    return pcm[:len(pcm) // channels * channels].reshape(-1, channels).copy()
+
+
+def normalize_peak(pcm, headroom_db=NORMALIZE_HEADROOM_DB):
+    """Scale so the loudest sample sits `headroom_db` below full scale"""
+    peak = np.abs(pcm).max() if pcm.size else 0.0
+    if peak <= 0:
+        return pcm
+    return pcm * np.float32(10 ** (-headroom_db / 20) / peak)
+
+
+def compress_dynamic_range(pcm, fps=AUDIO_FPS, threshold_db=COMPRESS_THRESHOLD_DB, ratio=COMPRESS_RATIO,
+                           attack=COMPRESS_ATTACK, release=COMPRESS_RELEASE):
+    """
+    Downward compressor, vectorized.
+
+    The level is the RMS over the last `attack` seconds; gain reduction is
+    held for `release` seconds and eased in over `attack`, which follows
+    the fast-attack/slow-release shape of pydub's per-sample loop.
+    """
+    mono = pcm.mean(axis=1) if pcm.ndim > 1 else pcm
+    n = len(mono)
+    look = max(1, int(fps * attack))
+    if n == 0:
+        return pcm
+
+    # Trailing RMS for every sample from a running sum of squares
+    sums = np.concatenate([[0.0], np.cumsum(mono.astype(np.float64) ** 2)])
+    idx = np.arange(1, n + 1)
+    start = np.maximum(idx - look, 0)
+    rms = np.sqrt((sums[idx] - sums[start]) / np.maximum(idx - start, 1))
+
+    threshold = 10 ** (threshold_db / 20)
+    over_db = 20 * np.log10(np.maximum(rms, 1e-12) / threshold)
+    reduction = (1 - 1 / ratio) * np.maximum(over_db, 0.0)
+
+    # Release: hold the strongest reduction of the last `release` seconds
+    hold = max(1, int(fps * release))
+    reduction = sliding_window_view(np.pad(reduction, (hold - 1, 0), mode="edge"), hold).max(axis=1)
+    # Attack: ease into it
+    reduction = np.convolve(np.pad(reduction, (look - 1, 0), mode="edge"), np.ones(look) / look, mode="valid")
+
+    gain = (10 ** (-reduction / 20)).astype(np.float32)
+    return pcm * (gain[:, None] if pcm.ndim > 1 else gain)
+
+
+def process_voice(mp3_bytes, fps=AUDIO_FPS):
+    """Decode + deepen + EQ + normalize + compress, all in memory"""
+    pcm = decode_voice(mp3_bytes, fps)
+    pcm = normalize_peak(pcm)
+    return compress_dynamic_range(pcm, fps)
+
+
+def normalize_text(text):
+    """Canonical form of a script for cache keys (NFC, collapsed whitespace)"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+async def synthesize_voice_async(text, voice_name=VOICE_NAME, rate=VOICE_RATE, pitch=VOICE_PITCH,
+                                 volume=VOICE_VOLUME, fps=AUDIO_FPS):
+    """
+    Generate the processed voice-over for a text (no caching).
+
+    The edge-tts stream is awaited on the running loop; the CPU-bound
+    processing runs in a worker thread so the loop stays free.
+
+    Args:
+        text: Text to speak
+        voice_name: edgeTTS voice
+        rate: edgeTTS speaking rate, e.g. "+10%"
+        pitch: edgeTTS pitch, e.g. "-15Hz"
+        volume: edgeTTS volume, e.g. "+15%"
+        fps: Sample rate of the returned PCM
+
+    Returns:
+        (pcm, word_boundaries) - float32 PCM of shape (samples, 2) and the
+        word timings from edgeTTS, stretched to match the deepened voice
+    """
+    if not EDGE_TTS_AVAILABLE:
+        raise ImportError("edge-tts not installed! Run: pip install edge-tts")
+    mp3_bytes, words = await stream_edge_tts(text, voice_name, rate, pitch, volume)
+
+    stretch = 2.0 ** -DEEPEN_OCTAVES  # Lower playback rate -> longer speech
+    words = [dict(w, offset=w["offset"] * stretch, duration=w["duration"] * stretch) for w in words]
+    pcm = await asyncio.to_thread(process_voice, mp3_bytes, fps)
+    return pcm, words
+
+
+def synthesize_voice(text, voice_name=VOICE_NAME, rate=VOICE_RATE, pitch=VOICE_PITCH,
+                     volume=VOICE_VOLUME, fps=AUDIO_FPS):
+    """Blocking version of synthesize_voice_async()"""
+    if not EDGE_TTS_AVAILABLE:
+        raise ImportError("edge-tts not installed! Run: pip install edge-tts")
+    return asyncio.run(synthesize_voice_async(text, voice_name, rate, pitch, volume, fps))
+
+
+def _load_cached_voice(key):
+    pcm = voice_cache.load_array(key)
+    words_path = voice_cache.lookup(key, ".json")
+    if pcm is None or not words_path:
+        return None
+    try:
+        with open(words_path, "r", encoding="utf-8") as f:
+            return pcm, json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_voice(key, pcm, words):
+    def write_words(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(words, f, ensure_ascii=False)
+
+    voice_cache.store(key, write_words, ".json")
+    voice_cache.save_array(key, pcm)
+
+
+async def get_voice_async(text, voice_name=VOICE_NAME, rate=VOICE_RATE, pitch=VOICE_PITCH,
+                          volume=VOICE_VOLUME, fps=AUDIO_FPS):
+    """
+    Processed voice-over for a text, from the cache when possible.
+
+    Entries are keyed by the normalized text, every voice setting and
+    POSTPROC_VERSION; each stores the PCM (.npy) and the word timings
+    (.json). The cache is size-bounded (VOICE_CACHE_MAX_MB, LRU).
+
+    Returns:
+        (pcm, word_boundaries), like synthesize_voice_async()
+    """
+    text = normalize_text(text)
+    key = make_key(text, voice_name, rate, pitch, volume, fps, POSTPROC_VERSION)
+
+    cached = _load_cached_voice(key)
+    if cached is not None:
+        return cached
+
+    pcm, words = await synthesize_voice_async(text, voice_name, rate, pitch, volume, fps)
+    _store_voice(key, pcm, words)
+    return pcm, words
+
+
+def get_voice(text, voice_name=VOICE_NAME, rate=VOICE_RATE, pitch=VOICE_PITCH,
+              volume=VOICE_VOLUME, fps=AUDIO_FPS):
+    """Blocking version of get_voice_async()"""
+    text = normalize_text(text)
+    key = make_key(text, voice_name, rate, pitch, volume, fps, POSTPROC_VERSION)
+
+    cached = _load_cached_voice(key)
+    if cached is not None:
+        return cached
+
+    pcm, words = synthesize_voice(text, voice_name, rate, pitch, volume, fps)
+    _store_voice(key, pcm, words)
+    return pcm, words
+
+
+def write_wav(path, pcm, fps=AUDIO_FPS):
+    """Write float PCM as a 16-bit WAV (for debugging / external use)"""
+    data = (np.clip(pcm, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(data.shape[1] if data.ndim > 1 else 1)
+        wav.setsampwidth(2)
+        wav.setframerate(fps)
+        wav.writeframes(data.tobytes())
+    return path